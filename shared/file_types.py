@@ -0,0 +1,83 @@
+"""
+対応ファイル形式の定義
+Webアプリのアップローダー・種別判定と、音声・動画処理の検証で同じ拡張子一覧を使う
+"""
+
+import logging
+from typing import Literal
+
+logger = logging.getLogger(__name__)
+
+# 動画ファイルの拡張子（小文字・ドット付き）
+VIDEO_EXTS = frozenset({
+    '.mp4', '.avi', '.mov', '.mkv', '.wmv', '.webm',
+    '.flv', '.m4v', '.3gp', '.mts'
+})
+
+# 音声ファイルの拡張子（小文字・ドット付き）
+AUDIO_EXTS = frozenset({'.wav', '.mp3', '.flac', '.m4a', '.ogg'})
+
+# st.file_uploader の type 引数用（ドット無し・ソート済み）
+AUDIO_TYPES = tuple(sorted(ext.lstrip('.') for ext in AUDIO_EXTS))
+ALL_TYPES = tuple(sorted(ext.lstrip('.') for ext in AUDIO_EXTS | VIDEO_EXTS))
+
+# ISO-BMFF（ftyp）のうち音声のみのコンテナを示すブランド
+AUDIO_ONLY_BRANDS = frozenset({b'M4A ', b'M4B ', b'M4P ', b'F4A '})
+# ISO-BMFF（ftyp）のうち動画コンテナを示すブランド
+# isom / mp42 / 3gp4 等の汎用ブランドは音声のみのファイルにも使われるため、どちらにも含めない
+VIDEO_ONLY_BRANDS = frozenset({b'qt  ', b'M4V ', b'M4VH', b'M4VP', b'F4V '})
+
+# ファイル種別の判定に必要な先頭バイト数
+SNIFF_BYTES = 16
+
+def sniff_kind(blob: bytes) -> Literal['audio', 'video', 'unknown']:
+    """
+    ファイル先頭のマジックバイトからコンテナの種別を判定
+
+    拡張子を書き換えられたファイルでも正しい処理経路を選べるよう、
+    先頭 SNIFF_BYTES バイトだけを見て音声・動画を判別します。
+
+    Args:
+        blob: ファイルの先頭バイト列（SNIFF_BYTES バイト以上推奨）
+
+    Returns:
+        str: 'audio' / 'video'、判別できない場合は 'unknown'
+    """
+    if blob[:4] == b'RIFF':
+        if blob[8:12] == b'WAVE':
+            return 'audio'
+        if blob[8:12] == b'AVI ':
+            return 'video'
+    elif blob[:4] in (b'fLaC', b'OggS') or blob[:3] == b'ID3':
+        return 'audio'
+    elif blob[4:8] == b'ftyp':
+        # MP4/MOV/M4A 等。専用ブランドの場合のみ判定し、汎用ブランドは拡張子に任せる
+        if blob[8:12] in AUDIO_ONLY_BRANDS:
+            return 'audio'
+        if blob[8:12] in VIDEO_ONLY_BRANDS:
+            return 'video'
+    elif blob[:4] == b'\x1a\x45\xdf\xa3':
+        # Matroska / WebM
+        return 'video'
+    elif len(blob) >= 2 and blob[0] == 0xFF and blob[1] & 0xE0 == 0xE0:
+        # ID3タグ無しのMP3フレーム同期ワード
+        return 'audio'
+    return 'unknown'
+
+def is_video_content(head: bytes, extension: str) -> bool:
+    """
+    先頭バイトのマジックバイトで動画かどうかを判定（判別できない場合のみ拡張子で判定）
+
+    Args:
+        head: ファイルの先頭バイト列
+        extension: 小文字・ドット付きの拡張子
+
+    Returns:
+        bool: 動画として処理すべき場合は True
+    """
+    kind = sniff_kind(head)
+    if kind == 'unknown':
+        return extension in VIDEO_EXTS
+    if (kind == 'video') != (extension in VIDEO_EXTS):
+        logger.info(f"拡張子 {extension} と実際の形式（{kind}）が異なるため、内容に基づいて処理します")
+    return kind == 'video'
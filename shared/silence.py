@@ -0,0 +1,136 @@
+"""
+無音区間の検出ユーティリティ
+チャンクの分割位置を無音部分に寄せ、発話の途中で音声が切れるのを防ぐ
+"""
+
+import wave
+import logging
+from typing import Callable, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 分割位置を探す範囲（本来の分割位置の前後、ミリ秒）
+SILENCE_SEARCH_MS = 10000
+# 音量を計算するフレーム長（ミリ秒）
+SILENCE_WINDOW_MS = 50
+# これより小さい音量（dBFS）を無音とみなす
+SILENCE_THRESHOLD_DB = -40.0
+
+def frame_levels_db(samples: np.ndarray, window: int) -> np.ndarray:
+    """
+    16bit PCMサンプルをフレームごとのRMS音量（dBFS）に変換
+
+    Args:
+        samples: int16のモノラルサンプル列
+        window: 1フレームのサンプル数
+
+    Returns:
+        np.ndarray: フレームごとの音量（dBFS）。端数のサンプルは切り捨て
+    """
+    frame_count = len(samples) // window
+    frames = samples[:frame_count * window].astype(np.float32).reshape(frame_count, window)
+    # einsum で二乗和をフレームごとに直接求め、二乗値の一時配列を作らない
+    rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / window)
+    return 20.0 * np.log10(rms / 32768.0 + 1e-10)
+
+def find_chunk_boundaries(read_window: Callable[[int, int], np.ndarray],
+                          total_samples: int,
+                          sample_rate: int,
+                          chunk_length_ms: int,
+                          search_ms: int = SILENCE_SEARCH_MS,
+                          window_ms: int = SILENCE_WINDOW_MS,
+                          threshold_db: float = SILENCE_THRESHOLD_DB) -> List[int]:
+    """
+    チャンク長ごとの分割位置を、前後の探索範囲内で最も近い無音フレームに寄せて求める
+
+    無音フレームが無い場合は探索範囲内で最も静かなフレームで分割します。
+    音声全体ではなく各分割位置の前後だけを読み込むため、長時間音声でもメモリを使いません。
+
+    Args:
+        read_window: (開始サンプル, 終了サンプル) を受け取り int16 のサンプル列を返す関数
+        total_samples: 総サンプル数
+        sample_rate: サンプリングレート（Hz）
+        chunk_length_ms: チャンクの長さ（ミリ秒）
+        search_ms: 本来の分割位置の前後を探索する範囲（ミリ秒）
+        window_ms: 音量を計算するフレーム長（ミリ秒）
+        threshold_db: 無音とみなす音量（dBFS）
+
+    Returns:
+        List[int]: 分割位置のサンプルオフセット（先頭と末尾は含まない）
+    """
+    chunk = sample_rate * chunk_length_ms // 1000
+    search = min(sample_rate * search_ms // 1000, chunk // 2)
+    window = max(1, sample_rate * window_ms // 1000)
+
+    boundaries = []
+    previous = 0
+    # 残りが1チャンク＋探索範囲に収まるなら、それ以上は分割しない
+    while previous + chunk + search < total_samples:
+        target = previous + chunk
+        start = target - search
+        samples = read_window(start, target + search)
+        levels = frame_levels_db(samples, window)
+        if levels.size == 0:
+            boundary = target
+        else:
+            centers = np.arange(levels.size) * window + window // 2
+            quiet = np.flatnonzero(levels < threshold_db)
+            if quiet.size:
+                # 本来の分割位置に最も近い無音フレーム
+                frame = quiet[np.argmin(np.abs(centers[quiet] - search))]
+            else:
+                frame = int(np.argmin(levels))
+            boundary = start + int(centers[frame])
+
+        boundaries.append(boundary)
+        previous = boundary
+
+    return boundaries
+
+def wav_chunk_boundaries(wav_path: str, chunk_length_ms: int) -> List[float]:
+    """
+    16bitモノラルWAVファイルの分割位置（秒）を無音部分に寄せて求める
+
+    Args:
+        wav_path: 16bitモノラルのWAVファイルパス
+        chunk_length_ms: チャンクの長さ（ミリ秒）
+
+    Returns:
+        List[float]: 分割位置（秒）。対応外の形式の場合は空のリスト
+    """
+    with wave.open(wav_path, 'rb') as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            logger.warning("16bitモノラル以外のWAVのため、無音検出を省略します")
+            return []
+
+        sample_rate = wav.getframerate()
+
+        def read_window(start, end):
+            wav.setpos(start)
+            return np.frombuffer(wav.readframes(end - start), dtype='<i2')
+
+        boundaries = find_chunk_boundaries(read_window, wav.getnframes(), sample_rate, chunk_length_ms)
+
+    return [boundary / sample_rate for boundary in boundaries]
+
+def array_chunk_boundaries(samples: np.ndarray, sample_rate: int, chunk_length_ms: int) -> List[int]:
+    """
+    メモリ上のサンプル列の分割位置（ミリ秒）を無音部分に寄せて求める
+
+    Args:
+        samples: int16のモノラルサンプル列
+        sample_rate: サンプリングレート（Hz）
+        chunk_length_ms: チャンクの長さ（ミリ秒）
+
+    Returns:
+        List[int]: 分割位置（ミリ秒）
+    """
+    boundaries = find_chunk_boundaries(
+        lambda start, end: samples[start:end],
+        len(samples),
+        sample_rate,
+        chunk_length_ms
+    )
+    return [boundary * 1000 // sample_rate for boundary in boundaries]
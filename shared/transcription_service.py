@@ -1,10 +1,13 @@
 import os
 import asyncio
 import tempfile
+import shutil
+import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 import logging
 import warnings
+import wave
 
 # Google Cloud関連 - Speech-to-Text v2 API
 from google.cloud.speech_v2 import SpeechClient
@@ -12,11 +15,20 @@ from google.cloud.speech_v2.types import cloud_speech
 from google.cloud import storage
 from google.oauth2 import service_account
 from google.api_core.client_options import ClientOptions
+from google.auth.credentials import with_scopes_if_required
+from google.auth.transport.requests import AuthorizedSession
+from requests.adapters import HTTPAdapter
 import json
 
 # 音声処理関連
+import numpy as np
 from pydub import AudioSegment
-from pydub.utils import make_chunks
+
+# 対応ファイル形式
+from shared.file_types import AUDIO_EXTS
+
+# 無音検出（分割位置の調整）
+from shared.silence import array_chunk_boundaries, wav_chunk_boundaries
 
 # ログ設定
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -25,6 +37,38 @@ logger = logging.getLogger(__name__)
 # RSA警告を抑制（Google認証の不完全なキーファイル警告）
 warnings.filterwarnings('ignore', message='You have provided a malformed keyfile')
 
+# GCSクライアントのHTTPコネクションプール設定（チャンクアップロード間でソケットを再利用）
+GCS_POOL_CONNECTIONS = 16
+GCS_POOL_MAXSIZE = 32
+
+# batch_recognize 1リクエストあたりの最大ファイル数（API上限）
+BATCH_RECOGNIZE_MAX_FILES = 15
+
+# チャンクのアップロード＋文字起こしの同時実行数（v2 APIの安定性のため控えめ）
+DEFAULT_TRANSCRIPTION_CONCURRENCY = 3
+
+# batch_recognize の完了確認間隔と待機上限（秒）
+OPERATION_POLL_INTERVAL_SEC = 5
+OPERATION_TIMEOUT_SEC = 3600
+
+def create_storage_http_session(credentials) -> AuthorizedSession:
+    """
+    コネクションプールを拡張した認証済みHTTPセッションを作成
+    
+    storage.Client は渡された _http をそのまま使うため、ここでGCS用のスコープを付与します
+    （スコープ無しのサービスアカウント資格情報ではトークン更新が invalid_scope で失敗する）。
+    
+    Args:
+        credentials: Google Cloudの認証情報
+        
+    Returns:
+        AuthorizedSession: storage.Clientに渡すHTTPセッション
+    """
+    session = AuthorizedSession(with_scopes_if_required(credentials, storage.Client.SCOPE))
+    adapter = HTTPAdapter(pool_connections=GCS_POOL_CONNECTIONS, pool_maxsize=GCS_POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    return session
+
 class AudioTranscriptionService:
     """
     Speech-to-Text v2 API (Chirp) を使用した音声文字起こしサービス
@@ -71,15 +115,18 @@ class AudioTranscriptionService:
                 credentials=credentials,
                 client_options=client_options
             )
-            self.storage_client = storage.Client(credentials=credentials)
+            self.storage_client = storage.Client(
+                project=self.project_id,
+                credentials=credentials,
+                _http=create_storage_http_session(credentials)
+            )
             
         elif service_account_path:
-            # ファイルパスから認証情報を読み込み
-            with open(service_account_path, 'r') as f:
-                sa_info = json.load(f)
+            # ファイルパスから認証情報を読み込み（1度だけ読んで資格情報にも流用）
+            sa_info = json.loads(Path(service_account_path).read_text(encoding='utf-8'))
             self.project_id = sa_info.get("project_id")
             
-            credentials = service_account.Credentials.from_service_account_file(service_account_path)
+            credentials = service_account.Credentials.from_service_account_info(sa_info)
             
             # v2 API用のクライアントオプション（リージョンエンドポイント）
             client_options = ClientOptions(
@@ -89,7 +136,11 @@ class AudioTranscriptionService:
                 credentials=credentials,
                 client_options=client_options
             )
-            self.storage_client = storage.Client.from_service_account_json(service_account_path)
+            self.storage_client = storage.Client(
+                project=self.project_id,
+                credentials=credentials,
+                _http=create_storage_http_session(credentials)
+            )
         else:
             raise ValueError("service_account_pathまたはservice_account_infoのいずれかを指定してください")
         
@@ -126,8 +177,7 @@ class AudioTranscriptionService:
             logger.info(f"音声ファイルサイズ: {size_mb:.2f}MB")
             
             # 対応形式チェック（拡張子ベース）
-            supported_extensions = {'.wav', '.mp3', '.flac', '.m4a', '.ogg'}
-            if path.suffix.lower() not in supported_extensions:
+            if path.suffix.lower() not in AUDIO_EXTS:
                 logger.warning(f"未対応の可能性がある形式: {path.suffix}")
                 logger.info("WAV形式への変換を試行します")
             
@@ -160,7 +210,6 @@ class AudioTranscriptionService:
                 if audio.frame_rate == 16000 and audio.channels == 1:
                     logger.info("音声ファイルは既に最適な形式です")
                     if audio_path != output_path:
-                        import shutil
                         shutil.copy2(audio_path, output_path)
                     return True
             
@@ -250,7 +299,15 @@ class AudioTranscriptionService:
             # 音声分割処理をスレッドで実行
             def split_audio():
                 audio = AudioSegment.from_wav(audio_path)
-                chunks = make_chunks(audio, chunk_length_ms)
+                
+                # 16bitモノラルなら分割位置を無音部分に寄せる（それ以外は固定長で分割）
+                if audio.sample_width == 2 and audio.channels == 1:
+                    samples = np.frombuffer(audio.raw_data, dtype='<i2')
+                    boundaries = array_chunk_boundaries(samples, audio.frame_rate, chunk_length_ms)
+                else:
+                    boundaries = list(range(chunk_length_ms, len(audio), chunk_length_ms))
+                edges = [0] + boundaries + [len(audio)]
+                chunks = [audio[start:end] for start, end in zip(edges, edges[1:])]
                 
                 chunk_files = []
                 temp_dir = tempfile.mkdtemp()
@@ -271,6 +328,80 @@ class AudioTranscriptionService:
             logger.error(f"音声分割エラー: {str(e)}")
             return []
     
+    async def _run_ffmpeg(self, ffmpeg_path: str, *args: str) -> bool:
+        """
+        ffmpegをサブプロセスで実行（イベントループを塞がない）
+        
+        Args:
+            ffmpeg_path: ffmpeg実行ファイルのパス
+            *args: ffmpegに渡す引数
+            
+        Returns:
+            bool: 実行成功フラグ
+        """
+        process = await asyncio.create_subprocess_exec(
+            ffmpeg_path, "-nostdin", "-hide_banner", "-loglevel", "error", *args,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            logger.warning(f"ffmpegの実行に失敗 (code={process.returncode}): {stderr.decode(errors='replace').strip()}")
+            return False
+        return True
+    
+    async def segment_audio_with_ffmpeg(self, audio_path: str, output_dir: str, chunk_length_ms: int = 300000) -> list:
+        """
+        ffmpegで変換（16kHz・モノラル・16bit PCM）し、無音部分に寄せた位置で分割
+        
+        pydubのように音声全体をメモリに展開せず、変換済みWAVから分割位置の前後だけを読んで
+        無音を探し、ストリームコピーでチャンクファイルを書き出します。
+        
+        Args:
+            audio_path: 入力音声ファイルパス
+            output_dir: チャンクの出力先ディレクトリ
+            chunk_length_ms: チャンクの長さ（ミリ秒）
+            
+        Returns:
+            list: 分割された音声ファイルパスのリスト（ffmpegが無い・失敗した場合は空）
+        """
+        ffmpeg_path = shutil.which("ffmpeg")
+        if ffmpeg_path is None:
+            logger.info("ffmpegが見つからないため、pydubで変換・分割します")
+            return []
+        
+        try:
+            logger.info("ffmpegで音声を変換・分割中...")
+            wav_path = os.path.join(output_dir, "ffmpeg_audio.wav")
+            if not await self._run_ffmpeg(
+                ffmpeg_path, "-i", audio_path,
+                "-vn", "-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le", wav_path
+            ):
+                return []
+            
+            # 分割位置を無音部分に寄せる（NumPyで分割位置の前後のみ解析）
+            boundaries = await asyncio.to_thread(wav_chunk_boundaries, wav_path, chunk_length_ms)
+            if not boundaries:
+                logger.info("音声を1個のチャンクとして処理します")
+                return [wav_path]
+            
+            if not await self._run_ffmpeg(
+                ffmpeg_path, "-i", wav_path, "-c", "copy",
+                "-f", "segment", "-segment_times", ",".join(f"{boundary:.3f}" for boundary in boundaries),
+                "-reset_timestamps", "1",
+                os.path.join(output_dir, "chunk_%04d.wav")
+            ):
+                return []
+            await asyncio.to_thread(os.unlink, wav_path)
+            
+            chunk_files = sorted(str(path) for path in Path(output_dir).glob("chunk_*.wav"))
+            logger.info(f"音声を{len(chunk_files)}個のチャンクに分割完了（無音位置で分割）")
+            return chunk_files
+            
+        except (OSError, wave.Error) as e:
+            logger.warning(f"ffmpegでの変換・分割に失敗: {str(e)}")
+            return []
+    
     async def upload_to_gcs(self, local_path: str, gcs_path: str) -> bool:
         """
         ファイルをGoogle Cloud Storageにアップロード
@@ -285,7 +416,8 @@ class AudioTranscriptionService:
         try:
             bucket = self.storage_client.bucket(self.gcs_bucket_name)
             blob = bucket.blob(gcs_path)
-            blob.upload_from_filename(local_path)
+            # アップロードは同期I/Oのため、イベントループを塞がないようスレッドで実行
+            await asyncio.to_thread(blob.upload_from_filename, local_path)
             logger.info(f"GCSにアップロード完了: {gcs_path}")
             return True
             
@@ -293,6 +425,51 @@ class AudioTranscriptionService:
             logger.error(f"GCSアップロードエラー: {str(e)}")
             return False
     
+    async def _wait_for_operation(self, operation, timeout: float = OPERATION_TIMEOUT_SEC):
+        """
+        長時間実行オペレーション（LRO）の完了を待って結果を返す
+        
+        operation.result() で完了までスレッドを占有すると、共有イベントループの
+        既定スレッドプールが枯渇して他セッションのアップロード等が止まるため、
+        短い完了確認だけをスレッドで行い、待機は asyncio.sleep で行います。
+        
+        Args:
+            operation: batch_recognize が返したオペレーション
+            timeout: 待機上限（秒）
+            
+        Returns:
+            オペレーションの結果（BatchRecognizeResponse）
+        """
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not await asyncio.to_thread(operation.done):
+            if asyncio.get_running_loop().time() >= deadline:
+                raise TimeoutError(f"認識処理が{timeout}秒以内に完了しませんでした")
+            await asyncio.sleep(OPERATION_POLL_INTERVAL_SEC)
+        # 完了済みのためブロックしない（失敗時は例外を送出）
+        return operation.result()
+    
+    def _recognition_config(self) -> cloud_speech.RecognitionConfig:
+        """
+        v2 API用の認識設定を作成（明示的なエンコーディング設定を使用）
+        
+        Returns:
+            cloud_speech.RecognitionConfig: 16kHzモノラルLINEAR16・日本語・Chirpモデルの設定
+        """
+        explicit_decoding_config = cloud_speech.ExplicitDecodingConfig(
+            encoding=cloud_speech.ExplicitDecodingConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=16000,
+            audio_channel_count=1,
+        )
+        
+        return cloud_speech.RecognitionConfig(
+            explicit_decoding_config=explicit_decoding_config,
+            language_codes=["ja-JP"],  # 日本語
+            model="chirp",  # Chirpモデル（最新の高精度モデル）
+            features=cloud_speech.RecognitionFeatures(
+                enable_automatic_punctuation=True,  # 自動句読点
+            ),
+        )
+    
     async def transcribe_audio_chunk(self, gcs_uri: str, chunk_index: int) -> Optional[str]:
         """
         音声チャンクを文字起こし（v2 API - Chirpモデル使用）
@@ -309,22 +486,7 @@ class AudioTranscriptionService:
             logger.info(f"GCS URI: {gcs_uri}")
             logger.info(f"Recognizer: {self.recognizer_path}")
             
-            # v2 API用の認識設定
-            # 明示的なエンコーディング設定を使用
-            explicit_decoding_config = cloud_speech.ExplicitDecodingConfig(
-                encoding=cloud_speech.ExplicitDecodingConfig.AudioEncoding.LINEAR16,
-                sample_rate_hertz=16000,
-                audio_channel_count=1,
-            )
-            
-            config = cloud_speech.RecognitionConfig(
-                explicit_decoding_config=explicit_decoding_config,
-                language_codes=["ja-JP"],  # 日本語
-                model="chirp",  # Chirpモデル（最新の高精度モデル）
-                features=cloud_speech.RecognitionFeatures(
-                    enable_automatic_punctuation=True,  # 自動句読点
-                ),
-            )
+            config = self._recognition_config()
             
             # バッチ認識用のファイル設定
             file_metadata = cloud_speech.BatchRecognizeFileMetadata(uri=gcs_uri)
@@ -351,8 +513,8 @@ class AudioTranscriptionService:
 
             logger.info(f"チャンク {chunk_index} の認識処理を待機中...")
 
-            # operation.result自体もブロッキングのためスレッド実行
-            response = await asyncio.to_thread(operation.result, timeout=3600)  # 最大1時間待機
+            # スレッドを占有しないよう完了確認をポーリング（最大1時間待機）
+            response = await self._wait_for_operation(operation)
             
             logger.info(f"チャンク {chunk_index}: レスポンス受信完了")
             
@@ -410,40 +572,150 @@ class AudioTranscriptionService:
             logger.error(f"スタックトレース: {traceback.format_exc()}")
             return None
     
-    async def process_audio_chunks_parallel(self, chunk_files: list) -> list:
+    async def transcribe_audio_batch(self, gcs_uris: list, first_index: int) -> list:
         """
-        複数の音声チャンクを並行処理で文字起こし
+        複数の音声チャンクを1回の batch_recognize でまとめて文字起こし
+        
+        インライン出力は1ファイルのリクエストでしか使えないため、
+        結果はGCSの一時プレフィックスに出力させ、読み込んだ後に削除します。
         
         Args:
-            chunk_files: 音声チャンクファイルのリスト
+            gcs_uris: GCS上の音声ファイルURIのリスト（最大 BATCH_RECOGNIZE_MAX_FILES 件）
+            first_index: 先頭チャンクのインデックス（ログ用）
             
         Returns:
-            list: 文字起こし結果のリスト
+            list: gcs_urisと同じ順序の文字起こし結果（失敗・空のチャンクはNone）
         """
-        tasks = []
-        gcs_uris = []
-        
-        # 各チャンクをGCSにアップロード
-        for i, chunk_file in enumerate(chunk_files):
-            gcs_path = f"audio_chunks/chunk_{i:04d}.wav"
-            await self.upload_to_gcs(chunk_file, gcs_path)
-            gcs_uri = f"gs://{self.gcs_bucket_name}/{gcs_path}"
-            gcs_uris.append(gcs_uri)
+        last_index = first_index + len(gcs_uris) - 1
+        try:
+            logger.info(f"チャンク {first_index}-{last_index} をまとめて文字起こし開始 (v2 API - Chirpモデル)")
+            
+            output_prefix = f"gs://{self.gcs_bucket_name}/transcripts/{uuid.uuid4().hex}/"
+            request = cloud_speech.BatchRecognizeRequest(
+                recognizer=self.recognizer_path,
+                config=self._recognition_config(),
+                files=[cloud_speech.BatchRecognizeFileMetadata(uri=uri) for uri in gcs_uris],
+                recognition_output_config=cloud_speech.RecognitionOutputConfig(
+                    gcs_output_config=cloud_speech.GcsOutputConfig(uri=output_prefix)
+                ),
+            )
+            
+            # ブロッキング処理をスレッドで実行
+            operation = await asyncio.to_thread(
+                self.speech_client.batch_recognize,
+                request=request
+            )
+            logger.info(f"チャンク {first_index}-{last_index} の認識処理を待機中...")
+            response = await self._wait_for_operation(operation)  # 最大1時間待機
+            
+            def collect_transcripts():
+                transcripts = []
+                for offset, uri in enumerate(gcs_uris):
+                    chunk_index = first_index + offset
+                    file_result = response.results.get(uri)
+                    if file_result is None or not file_result.cloud_storage_result.uri:
+                        error = file_result.error if file_result is not None else "結果なし"
+                        logger.error(f"チャンク {chunk_index}: エラー = {error}")
+                        transcripts.append(None)
+                        continue
+                    
+                    # GCSに出力された結果(JSON)を読み込んでから削除
+                    result_blob = storage.Blob.from_string(
+                        file_result.cloud_storage_result.uri,
+                        client=self.storage_client
+                    )
+                    results = cloud_speech.BatchRecognizeResults.from_json(
+                        result_blob.download_as_text(),
+                        ignore_unknown_fields=True
+                    )
+                    result_blob.delete()
+                    
+                    transcript = " ".join(
+                        alternative.transcript
+                        for result in results.results
+                        for alternative in result.alternatives
+                        if alternative.transcript
+                    ).strip()
+                    if transcript:
+                        logger.info(f"チャンク {chunk_index} の文字起こし完了 - 文字数: {len(transcript)}")
+                    else:
+                        logger.warning(f"チャンク {chunk_index} の文字起こし結果が空です")
+                    transcripts.append(transcript or None)
+                return transcripts
+            
+            return await asyncio.to_thread(collect_transcripts)
+            
+        except Exception as e:
+            logger.error(f"チャンク {first_index}-{last_index} の文字起こしエラー: {str(e)}")
+            import traceback
+            logger.error(f"スタックトレース: {traceback.format_exc()}")
+            return [None] * len(gcs_uris)
+    
+    async def process_audio_chunks_parallel(self,
+                                          chunk_files: list,
+                                          concurrency: int = DEFAULT_TRANSCRIPTION_CONCURRENCY,
+                                          progress_callback: Optional[Callable[[int, int], None]] = None,
+                                          transcript_callback: Optional[Callable[[str], None]] = None) -> list:
+        """
+        複数の音声チャンクを並行処理で文字起こし
         
-        # 並行処理で文字起こし実行
-        for i, gcs_uri in enumerate(gcs_uris):
-            task = self.transcribe_audio_chunk(gcs_uri, i)
-            tasks.append(task)
+        チャンクを同時実行数で均等に分けたバッチ（最大 BATCH_RECOGNIZE_MAX_FILES 件）にまとめ、
+        バッチごとにGCSへ並列アップロードしてから1回の batch_recognize で文字起こしします。
+        1チャンクだけのバッチはインライン出力の単一ファイル認識を使います。
         
-        # 同時実行数を制限（APIレート制限対策）
-        semaphore = asyncio.Semaphore(3)  # 最大3並行（v2 APIの安定性のため減少）
+        Args:
+            chunk_files: 音声チャンクファイルのリスト
+            concurrency: 同時に処理するバッチ数の上限（APIレート制限対策）
+            progress_callback: バッチ完了ごとに (完了チャンク数, 総数) で呼ばれるコールバック
+            transcript_callback: 先頭から連続して完了したチャンクの文字起こし結果を、
+                チャンク順に1件ずつ受け取るコールバック（空の結果は渡さない）
+            
+        Returns:
+            list: 文字起こし結果のリスト（chunk_filesと同じ順序）
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        total = len(chunk_files)
+        completed = 0
+        # 先頭のバッチから順に結果を返せるよう、同時実行数で均等に分ける
+        batch_size = max(1, min(BATCH_RECOGNIZE_MAX_FILES, -(-total // concurrency)))
+        finished = {}
+        next_index = 0
         
-        async def limited_transcribe(task):
+        async def process_batch(first_index, batch_files):
+            nonlocal completed, next_index
             async with semaphore:
-                return await task
+                gcs_paths = [f"audio_chunks/chunk_{first_index + offset:04d}.wav" for offset in range(len(batch_files))]
+                await asyncio.gather(*[
+                    self.upload_to_gcs(chunk_file, gcs_path)
+                    for chunk_file, gcs_path in zip(batch_files, gcs_paths)
+                ])
+                gcs_uris = [f"gs://{self.gcs_bucket_name}/{gcs_path}" for gcs_path in gcs_paths]
+                
+                if len(gcs_uris) == 1:
+                    results = [await self.transcribe_audio_chunk(gcs_uris[0], first_index)]
+                else:
+                    results = await self.transcribe_audio_batch(gcs_uris, first_index)
+            
+            # 同一イベントループ上で実行されるためロック不要
+            completed += len(batch_files)
+            if progress_callback:
+                progress_callback(completed, total)
+            if transcript_callback:
+                # 先頭から途切れずに揃った分だけをチャンク順に渡す
+                finished.update(zip(range(first_index, first_index + len(results)), results))
+                while next_index in finished:
+                    transcript = finished.pop(next_index)
+                    next_index += 1
+                    if transcript:
+                        transcript_callback(transcript)
+            return results
         
-        results = await asyncio.gather(*[limited_transcribe(task) for task in tasks])
-        return results
+        # gatherは引数の順序で結果を返すため、チャンクの順序は保たれる
+        batches = await asyncio.gather(*[
+            process_batch(start, chunk_files[start:start + batch_size])
+            for start in range(0, total, batch_size)
+        ])
+        return [result for batch in batches for result in batch]
     
     async def save_transcript_locally(self, 
                                     transcript: str, 
@@ -465,9 +737,8 @@ class AudioTranscriptionService:
             output_dir = Path(output_path).parent
             output_dir.mkdir(parents=True, exist_ok=True)
             
-            # UTF-8でファイル保存
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(transcript)
+            # UTF-8でファイル保存（イベントループを塞がないようスレッドで実行）
+            await asyncio.to_thread(Path(output_path).write_text, transcript, encoding='utf-8')
             
             # ファイルサイズ確認
             file_size = os.path.getsize(output_path) / 1024  # KB
@@ -479,20 +750,24 @@ class AudioTranscriptionService:
             logger.error(f"ローカル保存エラー: {str(e)}")
             return False
     
-    async def process_audio_transcription(self, 
-                                        audio_path: str, 
-                                        output_path: str,
-                                        chunk_length_ms: int = 300000) -> bool:
+    async def process_audio_transcription_to_string(self, 
+                                                  audio_path: str,
+                                                  chunk_length_ms: int = 300000,
+                                                  concurrency: int = DEFAULT_TRANSCRIPTION_CONCURRENCY,
+                                                  progress_callback: Optional[Callable[[int, int], None]] = None,
+                                                  transcript_callback: Optional[Callable[[str], None]] = None) -> str:
         """
-        ローカル音声ファイルの文字起こし処理
+        ローカル音声ファイルの文字起こし処理（結果を文字列で返す）
         
         Args:
             audio_path: ローカル音声ファイルパス
-            output_path: 出力テキストファイルパス
             chunk_length_ms: チャンクの長さ（ミリ秒）
+            concurrency: 同時に処理するチャンク数の上限
+            progress_callback: チャンク完了ごとに (完了数, 総数) で呼ばれるコールバック
+            transcript_callback: 完了したチャンクの文字起こし結果をチャンク順に受け取るコールバック
             
         Returns:
-            bool: 処理成功フラグ
+            str: 結合済みの文字起こし結果
         """
         # 入力ファイル検証
         if not self.validate_audio_file(audio_path):
@@ -505,23 +780,28 @@ class AudioTranscriptionService:
         try:
             logger.info("音声ファイルの文字起こし処理を開始 (Speech-to-Text v2 API - Chirp)")
             logger.info(f"入力ファイル: {audio_path}")
-            logger.info(f"出力ファイル: {output_path}")
             logger.info(f"リージョン: {self.location}")
             logger.info(f"プロジェクトID: {self.project_id}")
             
-            # 1. 音声ファイルをWAV形式に変換・最適化（必要な場合のみ）
-            if not await self.convert_to_wav_if_needed(audio_path, wav_path):
-                raise Exception("音声ファイルの最適化に失敗")
-            
-            # 2. 音声を処理可能なチャンクに分割
-            chunk_files = await self.split_audio_for_processing(wav_path, chunk_length_ms)
+            # 1-2. ffmpegで16kHzモノラルWAVへの変換とチャンク分割を1パスで実行
+            chunk_files = await self.segment_audio_with_ffmpeg(audio_path, temp_dir, chunk_length_ms)
             if not chunk_files:
-                raise Exception("音声分割に失敗")
+                # ffmpegが使えない場合はpydubで変換・分割
+                # 1. 音声ファイルをWAV形式に変換・最適化（必要な場合のみ）
+                if not await self.convert_to_wav_if_needed(audio_path, wav_path):
+                    raise Exception("音声ファイルの最適化に失敗")
+                
+                # 2. 音声を処理可能なチャンクに分割
+                chunk_files = await self.split_audio_for_processing(wav_path, chunk_length_ms)
+                if not chunk_files:
+                    raise Exception("音声分割に失敗")
             
             logger.info(f"処理するチャンク数: {len(chunk_files)}")
             
             # 3. 並行処理で文字起こし実行
-            transcripts = await self.process_audio_chunks_parallel(chunk_files)
+            transcripts = await self.process_audio_chunks_parallel(
+                chunk_files, concurrency, progress_callback, transcript_callback
+            )
             
             # 4. 結果を結合（Noneを除外）
             valid_transcripts = [t for t in transcripts if t]
@@ -534,27 +814,51 @@ class AudioTranscriptionService:
                 logger.error(f"transcripts: {transcripts}")
                 raise Exception("文字起こし結果が空です")
             
-            # 5. 結果をローカルに保存
-            success = await self.save_transcript_locally(final_transcript, output_path)
-            if not success:
-                raise Exception("ローカル保存に失敗")
-            
             logger.info("音声ファイルの文字起こし処理完了")
-            return True
+            return final_transcript
             
         except Exception as e:
             logger.error(f"処理エラー: {str(e)}")
             raise
         
         finally:
-            # クリーンアップ
-            import shutil
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-            
-            for chunk_file in chunk_files:
-                if os.path.exists(chunk_file):
-                    os.unlink(chunk_file)
+            # クリーンアップ（ファイル削除はイベントループを塞がないようスレッドで実行）
+            def cleanup():
+                if os.path.exists(temp_dir):
+                    shutil.rmtree(temp_dir)
+                
+                for chunk_file in chunk_files:
+                    if os.path.exists(chunk_file):
+                        os.unlink(chunk_file)
+            
+            await asyncio.to_thread(cleanup)
+    
+    async def process_audio_transcription(self, 
+                                        audio_path: str, 
+                                        output_path: str,
+                                        chunk_length_ms: int = 300000,
+                                        concurrency: int = DEFAULT_TRANSCRIPTION_CONCURRENCY) -> bool:
+        """
+        ローカル音声ファイルの文字起こし処理
+        
+        Args:
+            audio_path: ローカル音声ファイルパス
+            output_path: 出力テキストファイルパス
+            chunk_length_ms: チャンクの長さ（ミリ秒）
+            concurrency: 同時に処理するチャンク数の上限
+            
+        Returns:
+            bool: 処理成功フラグ
+        """
+        logger.info(f"出力ファイル: {output_path}")
+        final_transcript = await self.process_audio_transcription_to_string(audio_path, chunk_length_ms, concurrency)
+        
+        # 結果をローカルに保存
+        success = await self.save_transcript_locally(final_transcript, output_path)
+        if not success:
+            raise Exception("ローカル保存に失敗")
+        
+        return True
 
 # 使用例
 async def main():
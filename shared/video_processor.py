@@ -10,6 +10,8 @@ from pathlib import Path
 from typing import Optional, Tuple
 import asyncio
 
+from shared.file_types import VIDEO_EXTS
+
 # ログ設定（条件付きインポート前に定義）
 logger = logging.getLogger(__name__)
 
@@ -58,16 +60,27 @@ except ImportError:
     IMAGEIO_FFMPEG_AVAILABLE = False
     logger.warning("imageio-ffmpeg not available")
 
+# 再エンコードせずに音声ストリームをそのまま取り出せるコーデックと出力拡張子
+STREAM_COPY_AUDIO_EXTENSIONS = {
+    'aac': '.m4a',
+    'mp3': '.mp3',
+    'opus': '.ogg',
+    'flac': '.flac',
+}
+
 class VideoProcessor:
     """動画ファイル処理クラス"""
     
-    def __init__(self):
-        """VideoProcessorの初期化"""
-        self.supported_video_formats = {
-            '.mp4', '.avi', '.mov', '.wmv', '.flv', 
-            '.mkv', '.webm', '.m4v', '.3gp', '.mts'
-        }
+    def __init__(self, fast_audio_copy: bool = True):
+        """
+        VideoProcessorの初期化
+        
+        Args:
+            fast_audio_copy: 音声コーデックが対応していれば再エンコードせずストリームコピーで抽出するか
+        """
+        self.supported_video_formats = VIDEO_EXTS
         self.video_processing_available = MOVIEPY_AVAILABLE and CV2_AVAILABLE
+        self.fast_audio_copy = fast_audio_copy and FFMPEG_AVAILABLE
         
         # 詳細な可用性情報をログ出力
         logger.info(f"OpenCV available: {CV2_AVAILABLE}")
@@ -190,6 +203,47 @@ class VideoProcessor:
             logger.error(f"音声抽出エラー: {str(e)}")
             return False
     
+    async def copy_audio_stream(self, video_path: str, output_dir: str) -> Optional[str]:
+        """
+        動画の音声ストリームを再エンコードせずに取り出す（ffprobeでコーデックを確認）
+        
+        Args:
+            video_path: 入力動画ファイルパス
+            output_dir: 出力先ディレクトリ
+            
+        Returns:
+            Optional[str]: 取り出した音声ファイルのパス（対応外のコーデック・失敗時はNone）
+        """
+        def probe_and_copy():
+            probe = ffmpeg.probe(video_path, select_streams='a:0')
+            streams = probe.get('streams', [])
+            if not streams:
+                logger.info("音声ストリームが見つからないため、通常の抽出を行います")
+                return None
+            
+            codec = streams[0].get('codec_name')
+            extension = STREAM_COPY_AUDIO_EXTENSIONS.get(codec)
+            if extension is None:
+                logger.info(f"音声コーデック {codec} はストリームコピー対象外のため、通常の抽出を行います")
+                return None
+            
+            output_audio_path = os.path.join(output_dir, f"extracted_audio_{os.getpid()}{extension}")
+            (
+                ffmpeg
+                .input(video_path)
+                .output(output_audio_path, map='0:a:0', vn=None, acodec='copy')
+                .overwrite_output()
+                .run(quiet=True)
+            )
+            logger.info(f"音声ストリームをコピーで抽出しました（コーデック: {codec}）")
+            return output_audio_path
+        
+        try:
+            return await asyncio.to_thread(probe_and_copy)
+        except Exception as e:
+            logger.warning(f"音声ストリームのコピーに失敗、通常の抽出を行います: {str(e)}")
+            return None
+    
     def get_video_info(self, video_path: str) -> Optional[dict]:
         """
         動画ファイルの詳細情報を取得
@@ -221,12 +275,13 @@ class VideoProcessor:
             logger.error(f"動画情報取得エラー: {str(e)}")
             return None
     
-    async def process_video_for_transcription(self, video_path: str) -> Optional[str]:
+    async def process_video_for_transcription(self, video_path: str, output_dir: Optional[str] = None) -> Optional[str]:
         """
         動画ファイルを文字起こし用に処理（音声抽出）
         
         Args:
             video_path: 入力動画ファイルパス
+            output_dir: 音声の出力先ディレクトリ（省略時は新しい一時ディレクトリ。削除は呼び出し側で行う）
             
         Returns:
             str: 抽出された音声ファイルのパス（一時ファイル）
@@ -236,15 +291,21 @@ class VideoProcessor:
             if not self.video_processing_available:
                 raise Exception("動画処理ライブラリが利用できません。音声ファイルをご利用ください。")
             
-            # 入力ファイル検証
-            if not self.validate_video_file(video_path):
+            # 入力ファイル検証（cv2.VideoCaptureでのオープンはブロッキングのためスレッドで実行）
+            if not await asyncio.to_thread(self.validate_video_file, video_path):
                 raise Exception("入力動画ファイルの検証に失敗")
             
             # 一時ファイルパスを生成
-            temp_dir = tempfile.mkdtemp()
+            temp_dir = output_dir or tempfile.mkdtemp()
             audio_filename = f"extracted_audio_{os.getpid()}.wav"
             audio_path = os.path.join(temp_dir, audio_filename)
             
+            # 音声がAAC/MP3/Opus/FLACならデコードせずにストリームコピー（数秒で完了）
+            if self.fast_audio_copy:
+                copied_audio_path = await self.copy_audio_stream(video_path, temp_dir)
+                if copied_audio_path:
+                    return copied_audio_path
+            
             # 音声抽出
             success = await self.extract_audio_from_video(video_path, audio_path)
             if not success:
@@ -0,0 +1,36 @@
+"""
+shared.file_types のファイル種別判定のテスト
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from shared.file_types import is_video_content, sniff_kind
+
+def ftyp(brand: bytes) -> bytes:
+    """ISO-BMFF の先頭16バイト（ftypボックス）を生成"""
+    return b'\x00\x00\x00\x20ftyp' + brand + b'\x00\x00\x00\x00'
+
+def test_generic_iso_brand_is_unknown():
+    """isom / mp42 / 3gp4 等の汎用ブランド（.m4a 録音など）は拡張子に判定を任せる"""
+    for brand in (b'isom', b'mp42', b'3gp4'):
+        assert sniff_kind(ftyp(brand)) == 'unknown'
+
+def test_m4a_with_isom_brand_is_audio():
+    """isom ブランドの .m4a は音声として処理される（動画経路に回さない）"""
+    assert is_video_content(ftyp(b'isom'), '.m4a') is False
+    assert is_video_content(ftyp(b'isom'), '.mp4') is True
+
+def test_specific_iso_brands():
+    """専用ブランドは内容から判定する"""
+    assert sniff_kind(ftyp(b'M4A ')) == 'audio'
+    assert sniff_kind(ftyp(b'qt  ')) == 'video'
+
+def test_other_signatures():
+    """ftyp 以外のコンテナ"""
+    assert sniff_kind(b'RIFF\x00\x00\x00\x00WAVEfmt ') == 'audio'
+    assert sniff_kind(b'RIFF\x00\x00\x00\x00AVI LIST') == 'video'
+    assert sniff_kind(b'\x1a\x45\xdf\xa3' + b'\x00' * 12) == 'video'
+    assert sniff_kind(b'not a media file') == 'unknown'
@@ -0,0 +1,99 @@
+"""
+shared.silence の無音区間に寄せた分割位置計算のテスト
+"""
+
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from shared.silence import (
+    SILENCE_SEARCH_MS,
+    array_chunk_boundaries,
+    frame_levels_db,
+    wav_chunk_boundaries,
+)
+
+SAMPLE_RATE = 16000
+CHUNK_MS = 60 * 1000
+
+def tone(seconds: float) -> np.ndarray:
+    """440Hzの正弦波（int16）"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 440 * t) * 16000).astype(np.int16)
+
+def silence(seconds: float) -> np.ndarray:
+    """無音（int16）"""
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.int16)
+
+def chunk_lengths_ms(boundaries, total_ms):
+    """分割位置（ミリ秒）から各チャンクの長さを求める"""
+    edges = [0, *boundaries, total_ms]
+    return [end - start for start, end in zip(edges, edges[1:])]
+
+def test_frame_levels_db():
+    """無音は閾値より十分小さく、正弦波は大きい音量になる"""
+    window = SAMPLE_RATE // 20
+    levels = frame_levels_db(np.concatenate([silence(1), tone(1)]), window)
+    assert levels.size == 40
+    assert (levels[:20] < -100).all()
+    assert (levels[20:] > -10).all()
+
+def test_boundaries_snap_to_silence():
+    """本来の分割位置（60秒・120秒）の近くに挿入した無音区間で分割される"""
+    samples = np.concatenate([
+        tone(56), silence(1), tone(60), silence(1), tone(62)
+    ])
+    boundaries = array_chunk_boundaries(samples, SAMPLE_RATE, CHUNK_MS)
+    assert len(boundaries) == 2
+    # 1つ目の無音は 56〜57秒、2つ目は 117〜118秒
+    assert 56000 <= boundaries[0] <= 57000
+    assert 117000 <= boundaries[1] <= 118000
+
+def test_chunk_lengths_within_slack():
+    """各チャンクは空にならず、チャンク長＋探索範囲を超えない"""
+    samples = np.concatenate([tone(50), silence(0.5), tone(130), silence(0.5), tone(100)])
+    total_ms = len(samples) * 1000 // SAMPLE_RATE
+    boundaries = array_chunk_boundaries(samples, SAMPLE_RATE, CHUNK_MS)
+    lengths = chunk_lengths_ms(boundaries, total_ms)
+    assert boundaries == sorted(boundaries)
+    assert all(0 < length <= CHUNK_MS + SILENCE_SEARCH_MS for length in lengths)
+
+def test_no_silence_falls_back_to_quietest_frame():
+    """無音が無い場合も探索範囲内で分割する"""
+    samples = tone(200)
+    boundaries = array_chunk_boundaries(samples, SAMPLE_RATE, CHUNK_MS)
+    lengths = chunk_lengths_ms(boundaries, 200000)
+    assert boundaries
+    assert all(0 < length <= CHUNK_MS + SILENCE_SEARCH_MS for length in lengths)
+
+def test_all_silent_input():
+    """全て無音の場合は本来の分割位置付近で分割し、空のチャンクを作らない"""
+    boundaries = array_chunk_boundaries(silence(200), SAMPLE_RATE, CHUNK_MS)
+    lengths = chunk_lengths_ms(boundaries, 200000)
+    assert all(abs(length - CHUNK_MS) <= SILENCE_SEARCH_MS for length in lengths[:-1])
+    assert all(length > 0 for length in lengths)
+
+def test_short_input_is_not_split():
+    """チャンク長に満たない音声や空の音声は分割しない"""
+    assert array_chunk_boundaries(tone(5), SAMPLE_RATE, CHUNK_MS) == []
+    assert array_chunk_boundaries(silence(0), SAMPLE_RATE, CHUNK_MS) == []
+
+def test_wav_chunk_boundaries(tmp_path):
+    """WAVファイルからの計算はメモリ上の計算と同じ位置（秒）になる"""
+    samples = np.concatenate([tone(56), silence(1), tone(70)])
+    wav_path = tmp_path / "input.wav"
+    with wave.open(str(wav_path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+
+    seconds = wav_chunk_boundaries(str(wav_path), CHUNK_MS)
+    expected_ms = array_chunk_boundaries(samples, SAMPLE_RATE, CHUNK_MS)
+    assert len(seconds) == len(expected_ms)
+    assert all(abs(s * 1000 - ms) <= 1 for s, ms in zip(seconds, expected_ms))
+    assert 56 <= seconds[0] <= 57
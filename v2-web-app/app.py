@@ -14,129 +14,395 @@ st.set_page_config(
 )
 
 import os
+import shutil
 import tempfile
 import asyncio
+import bisect
+import contextlib
+import hashlib
+import hmac
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from pathlib import Path
 import logging
 from datetime import datetime
 import traceback
+import warnings
 import importlib.util
 
 # 共通機能のインポート
 import sys
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-
-from shared.transcription_service import AudioTranscriptionService
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 # ログ設定（最初に定義）
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# RSA警告を抑制（Google認証の不完全なキーファイル警告）
+warnings.filterwarnings('ignore', message='You have provided a malformed keyfile')
+
 # 環境から取得するデフォルト値
 # GCSバケット名のデフォルト: 環境変数 > デフォルト値の優先順位
 DEFAULT_GCS_BUCKET = os.getenv("GCS_BUCKET_NAME", "250728transcription-bucket").strip()
 DEFAULT_COMPANY_ACCESS_KEY = os.getenv("COMPANY_ACCESS_KEY", "tatsujiro25Koueki").strip()
 DEFAULT_SPEECH_LOCATION = os.getenv("GCP_SPEECH_LOCATION", "us-central1").strip()
 
-# 動画処理の条件付きインポート（詳細診断版）
-try:
+# ログイン試行回数の上限と「残り試行回数」表示文言（試行回数で引く）
+MAX_LOGIN_ATTEMPTS = 5
+_REMAINING_MSGS = tuple(f"残り試行回数: {MAX_LOGIN_ATTEMPTS - i}回" for i in range(MAX_LOGIN_ATTEMPTS + 1))
+
+# IP単位のログイン失敗制限（セッションをまたいだ総当たり対策）
+LOGIN_RATE_LIMIT_WINDOW_SEC = 300
+LOGIN_RATE_LIMIT_MAX_FAILURES = 20
+LOGIN_RATE_LIMIT_MAX_CLIENTS = 1024
+# X-Forwarded-For を追加する信頼済みプロキシの段数（Secrets/環境変数 TRUSTED_PROXY_HOPS。0 でヘッダーを使わない）
+DEFAULT_TRUSTED_PROXY_HOPS = os.getenv("TRUSTED_PROXY_HOPS", "1").strip()
+
+# ファイルパス（作業ディレクトリは変わらないため起動時に1度だけ解決）
+_HERE = Path(__file__).resolve().parent
+TITLE_IMAGE_PATH = _HERE / "assets" / "title_wizard.png"
+TITLE_IMAGE_EXISTS = TITLE_IMAGE_PATH.exists()
+CREDENTIALS_PATH = _HERE.parent / "credentials" / "service-account-key.json"
+LOGIN_CSS_PATH = _HERE / "assets" / "login.css"
+
+# アップロード上限（MB）。Streamlit Cloud無料枠のメモリ制限（1GB）対策で、
+# .streamlit/config.toml の server.maxUploadSize も同じ値にしてサーバー側で先に拒否する
+MAX_UPLOAD_SIZE_MB = 100
+
+# 対応拡張子（アップローダー・判定箇所・shared側の検証で共通の定義を使う）
+from shared.file_types import ALL_TYPES, AUDIO_TYPES, SNIFF_BYTES, is_video_content
+
+@st.cache_resource(show_spinner=False)
+def get_video_processor():
+    """
+    VideoProcessorをプロセス内で1度だけ生成して再利用
+    
+    moviepy/opencv のインポートは重いため、初めて動画を処理する時点まで遅延させます。
+    """
     from shared.video_processor import VideoProcessor
-    logger.info("VideoProcessor インポート成功")
+    return VideoProcessor()
+
+@st.cache_resource(show_spinner=False)
+def video_available():
+    """
+    動画処理ライブラリが実際に利用できるか（VideoProcessorの生成結果をキャッシュ）
     
-    # 実際のライブラリ可用性もチェック
-    video_processor = VideoProcessor()
-    logger.info("VideoProcessor インスタンス化成功")
+    起動時の VIDEO_PROCESSING_AVAILABLE はライブラリの所在確認のみのため、
+    インストール済みでもインポートに失敗するケースはここで検出します。
+    """
+    try:
+        return get_video_processor().video_processing_available
+    except Exception as e:
+        logger.error("VideoProcessor 初期化失敗: %s: %s", type(e).__name__, str(e))
+        return False
+
+@st.cache_resource(show_spinner=False)
+def get_transcription_service(gcs_bucket, credentials_key, location, _service_account_info=None, service_account_path=None):
+    """
+    AudioTranscriptionServiceを (バケット, 認証情報キー, リージョン) 単位でキャッシュ
     
-    VIDEO_PROCESSING_AVAILABLE = video_processor.video_processing_available
-    if VIDEO_PROCESSING_AVAILABLE:
-        logger.info("✅ 動画処理機能: 利用可能")
-    else:
-        logger.warning("⚠️ 動画処理機能: ライブラリ不足のため無効")
-        # 具体的にどのライブラリが不足しているかを確認
-        opencv_available = importlib.util.find_spec("cv2") is not None
-        moviepy_available = importlib.util.find_spec("moviepy.editor") is not None
-        if opencv_available:
-            logger.info("OpenCV: 利用可能")
-        else:
-            logger.warning("OpenCV: 利用不可")
-        if moviepy_available:
-            logger.info("MoviePy: 利用可能")
-        else:
-            logger.warning("MoviePy: 利用不可")
-            
-except ImportError as e:
-    VIDEO_PROCESSING_AVAILABLE = False
-    logger.warning("VideoProcessor インポートエラー: %s", e)
-except (RuntimeError, ValueError, OSError) as e:
-    VIDEO_PROCESSING_AVAILABLE = False
-    logger.error("VideoProcessor 初期化失敗: %s: %s", type(e).__name__, str(e))
-    logger.error("詳細トレースバック: %s", traceback.format_exc())
-
-# Streamlitページ設定
-st.set_page_config(
-    page_title="AI文字起こしサービス",
-    page_icon="🎤",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+    認証情報の辞書はハッシュ対象から除外し（引数名の先頭 _）、
+    credentials_key（SHA-256ダイジェストまたはファイルパス）でキャッシュを識別します。
+    google-cloud / pydub の読み込みは重いため、初回の文字起こし時まで遅延させます。
+    """
+    from shared.transcription_service import AudioTranscriptionService
+    
+    if _service_account_info is not None:
+        return AudioTranscriptionService(
+            service_account_info=_service_account_info,
+            gcs_bucket_name=gcs_bucket,
+            location=location
+        )
+    return AudioTranscriptionService(
+        service_account_path=service_account_path,
+        gcs_bucket_name=gcs_bucket,
+        location=location
+    )
 
-def main():
-    """メインアプリケーション"""
+@st.cache_resource
+def get_event_loop():
+    """
+    文字起こし用の常駐イベントループを取得
     
-    # タイトルとヘッダー（一番上に配置）
-    st.title("AI文字起こしサービス")
-    st.markdown("**音声ファイル・動画ファイルから高精度な日本語文字起こしを行います**")
+    クリックごとに asyncio.run でループを生成・破棄せず、
+    デーモンスレッド上で動き続ける1つのループにコルーチンを投入します。
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="transcription-loop", daemon=True).start()
+    return loop
+
+@st.cache_data(show_spinner=False)
+def _title_png_bytes():
+    """
+    タイトル画像のバイト列を取得（再実行のたびにディスクから読み直さない）
     
-    # タイトル画像の表示
-    title_image_path = os.path.join(os.path.dirname(__file__), "assets", "title_wizard.png")
-    if os.path.exists(title_image_path):
-        # 中央寄せで画像を表示
-        _, col2, _ = st.columns([1, 2, 1])
-        with col2:
-            st.image(title_image_path, width=300, caption="AI魔法使いコウイチくんによる文字起こし")
+    Returns:
+        bytes: title_wizard.png の内容
+    """
+    return TITLE_IMAGE_PATH.read_bytes()
+
+def credentials_fingerprint(service_account_info):
+    """
+    サービスアカウント情報からキャッシュキー用の短いダイジェストを生成（秘密情報自体は保持しない）
     
-    st.markdown("---")  # セパレーター追加
+    鍵ごとに一意な private_key のみをハッシュ化し、辞書全体のシリアライズを避けます。
+    """
+    return hashlib.sha256(service_account_info["private_key"].encode("utf-8")).hexdigest()[:16]
+
+# 動画処理の可用性チェック（起動時はライブラリの所在確認のみ・インポートは初回の動画処理時）
+opencv_available = importlib.util.find_spec("cv2") is not None
+moviepy_available = importlib.util.find_spec("moviepy") is not None
+VIDEO_PROCESSING_AVAILABLE = opencv_available and moviepy_available
+if VIDEO_PROCESSING_AVAILABLE:
+    logger.info("✅ 動画処理機能: 利用可能")
+else:
+    logger.warning("⚠️ 動画処理機能: ライブラリ不足のため無効")
+    # 具体的にどのライブラリが不足しているかを確認
+    if opencv_available:
+        logger.info("OpenCV: 利用可能")
+    else:
+        logger.warning("OpenCV: 利用不可")
+    if moviepy_available:
+        logger.info("MoviePy: 利用可能")
+    else:
+        logger.warning("MoviePy: 利用不可")
+
+# ファイルアップローダーの表示設定（動画処理の可用性に応じて起動時に1度だけ決定）
+if VIDEO_PROCESSING_AVAILABLE:
+    FILE_TYPES = ALL_TYPES
+    HELP_TEXT = f"音声ファイル・動画ファイル対応 | 最大ファイルサイズ: {MAX_UPLOAD_SIZE_MB}MB"
+    UPLOADER_LABEL = "音声ファイルまたは動画ファイルを選択してください"
+else:
+    FILE_TYPES = AUDIO_TYPES
+    HELP_TEXT = f"音声ファイルのみ対応（動画処理は現在利用不可）| 最大ファイルサイズ: {MAX_UPLOAD_SIZE_MB}MB"
+    UPLOADER_LABEL = "音声ファイルを選択してください（動画処理は現在利用不可）"
+
+# サイドバーの説明文（固定部分はモジュール読み込み時に1度だけ組み立てる）
+_SYSTEM_INFO_TPL = """
+**認証状態**: {auth}
+**GCSバケット**: {bucket}
+**処理方式**: 自動最適化
+"""
+
+_USAGE_MD = """
+1. **ファイル選択**: 音声またはビデオファイルをアップロード
+2. **処理開始**: 「文字起こし開始」ボタンをクリック
+3. **結果確認**: 文字起こし結果をダウンロード
+
+**対応形式**:
+- 音声: WAV, MP3, FLAC, M4A, OGG
+- 動画: MP4, AVI, MOV, MKV, WMV等
+
+**管理者向け**:
+認証ファイルは `credentials/service-account-key.json` に配置してください。
+"""
+
+# 管理者向けSecrets設定例（デバッグパネルで「設定例を表示」を押した時のみ描画）
+_FLAT_TOML_EXAMPLE = '''# Google Cloud Service Account (フラット形式)
+gcp_service_account_type = "service_account"
+gcp_service_account_project_id = "<YOUR_PROJECT_ID>"
+gcp_service_account_private_key_id = "<YOUR_PRIVATE_KEY_ID>"
+gcp_service_account_private_key = "<YOUR_PRIVATE_KEY>"
+gcp_service_account_client_email = "<YOUR_CLIENT_EMAIL>"
+gcp_service_account_client_id = "<YOUR_CLIENT_ID>"
+gcp_service_account_auth_uri = "https://accounts.google.com/o/oauth2/auth"
+gcp_service_account_token_uri = "https://oauth2.googleapis.com/token"
+gcp_service_account_auth_provider_x509_cert_url = "https://www.googleapis.com/oauth2/v1/certs"
+gcp_service_account_client_x509_cert_url = "<YOUR_CERT_URL>"
+
+# その他の設定
+GCS_BUCKET_NAME = "<YOUR_GCS_BUCKET_NAME>"
+COMPANY_ACCESS_KEY = "tatsujiro25Koueki"'''
+
+_SECTION_TOML_EXAMPLE = '''[gcp_service_account]
+type = "service_account"
+project_id = "<YOUR_PROJECT_ID>"
+private_key_id = "<YOUR_PRIVATE_KEY_ID>"
+private_key = "<YOUR_PRIVATE_KEY>"
+client_email = "<YOUR_CLIENT_EMAIL>"
+client_id = "<YOUR_CLIENT_ID>"
+auth_uri = "https://accounts.google.com/o/oauth2/auth"
+token_uri = "https://oauth2.googleapis.com/token"
+auth_provider_x509_cert_url = "https://www.googleapis.com/oauth2/v1/certs"
+client_x509_cert_url = "<YOUR_CERT_URL>"
+
+GCS_BUCKET_NAME = "<YOUR_GCS_BUCKET_NAME>"
+COMPANY_ACCESS_KEY = "tatsujiro25Koueki"'''
+
+# Secretsの再読み込み間隔（秒）。アクセスキーの変更・失効もこの時間内に反映される
+SECRETS_TTL_SECONDS = 60
+
+@st.cache_resource(ttl=SECRETS_TTL_SECONDS, show_spinner=False)
+def _secrets_snapshot():
+    """
+    Streamlit Secretsをプレーンなdictに展開して共有（SECRETS_TTL_SECONDS ごとに再読み込み）
     
-    # 認証情報の確認（Streamlit Cloud対応強化版）
-    credentials_path = os.path.join(os.path.dirname(__file__), "..", "credentials", "service-account-key.json")
+    プロセスを再起動しなくても、Secretsの更新（アクセスキーのローテーション等）が反映されます。
     
-    # 🔧 シンプルなSecrets処理（Base64エラー回避版）
-    debug_info = []
+    Returns:
+        dict: Secretsの内容（secrets.tomlが無い環境では空のdict）
+    """
+    try:
+        return dict(st.secrets)
+    except (FileNotFoundError, AttributeError, TypeError):
+        return {}
+
+# デバッグイベント（タグ, 引数）の表示書式。文字列化はデバッグパネル描画時まで遅延する
+_DEBUG_FORMATTERS = {
+    "local_file": "📁 ローカルファイル: %s",
+    "cloud": "☁️ Streamlit Cloud: %s",
+    "auth": "✅ 認証方式: %s",
+    "no_auth": "❌ 認証情報: なし",
+}
+
+def format_debug_events(debug_events):
+    """
+    デバッグイベントを表示用テキストに整形
+    
+    Args:
+        debug_events: detect_credentials が返す (タグ, 引数タプル) のリスト
+        
+    Returns:
+        str: 1イベント1行のテキスト
+    """
+    return "\n".join(_DEBUG_FORMATTERS[tag] % args for tag, args in debug_events)
+
+@st.cache_data(ttl=300)
+def detect_credentials(credentials_path):
+    """
+    認証方式を判定（ファイル存在確認とSecrets検出は5分間キャッシュ）
+    
+    Args:
+        credentials_path: ローカルのサービスアカウントキーファイルパス
+        
+    Returns:
+        Tuple[bool, bool, list]: (認証情報の有無, Streamlit Secrets使用フラグ, デバッグイベント)
+    """
+    debug_events = []
     logger.info("🔧 シンプルなSecrets処理開始")
     
     # ローカルファイルの存在確認
     local_file_exists = os.path.exists(credentials_path)
-    debug_info.append(f"📁 ローカルファイル: {'存在' if local_file_exists else '不存在'}")
+    debug_events.append(("local_file", ('存在' if local_file_exists else '不存在',)))
     
-    # Streamlit Cloud環境かどうか判定
-    try:
-        # Secretsが利用可能かチェック
-        secrets_available = hasattr(st, 'secrets') and len(st.secrets) > 0
-        debug_info.append(f"☁️ Streamlit Cloud: {'検出' if secrets_available else '未検出'}")
-    except (AttributeError, TypeError):
-        secrets_available = False
-        debug_info.append("☁️ Streamlit Cloud: 未検出（エラー）")
+    # Streamlit Cloud環境かどうか判定（Secretsが利用可能かチェック）
+    secrets_available = len(_secrets_snapshot()) > 0
+    debug_events.append(("cloud", ('検出' if secrets_available else '未検出',)))
     
     # 認証方式の決定
     if local_file_exists:
         # ローカル環境（開発環境）
         credentials_exists = True
         use_streamlit_secrets = False
-        debug_info.append("✅ 認証方式: ローカルファイル")
+        debug_events.append(("auth", ("ローカルファイル",)))
         logger.info("ローカルファイル認証を使用")
     elif secrets_available:
         # Streamlit Cloud環境
         credentials_exists = True
         use_streamlit_secrets = True
-        debug_info.append("✅ 認証方式: Streamlit Secrets")
+        debug_events.append(("auth", ("Streamlit Secrets",)))
         logger.info("Streamlit Secrets認証を使用")
     else:
         # 認証情報なし
         credentials_exists = False
         use_streamlit_secrets = False
-        debug_info.append("❌ 認証情報: なし")
+        debug_events.append(("no_auth", ()))
         logger.error("認証情報が見つかりません")
     
+    return credentials_exists, use_streamlit_secrets, debug_events
+
+@st.cache_data(ttl=SECRETS_TTL_SECONDS, show_spinner=False)
+def _default_bucket(use_secrets: bool) -> str:
+    """
+    GCSバケット名の初期値を決定（Secretsと同じ間隔で再解決）
+    
+    優先順位: Streamlit Secrets > 環境変数 > デフォルト値
+    """
+    secret_bucket = ""
+    if use_secrets:
+        secret_bucket = str(_secrets_snapshot().get("GCS_BUCKET_NAME", "")).strip()
+    env_bucket = os.getenv("GCS_BUCKET_NAME", "").strip()
+    return secret_bucket or env_bucket or DEFAULT_GCS_BUCKET
+
+# サービスアカウント情報のキー → (Secretsのフラットキー, 既定値)。既定値Noneは必須項目
+_FLAT_KEY_MAP = {
+    "type": ("gcp_service_account_type", None),
+    "project_id": ("gcp_service_account_project_id", None),
+    "private_key": ("gcp_service_account_private_key", None),
+    "client_email": ("gcp_service_account_client_email", None),
+    "private_key_id": ("gcp_service_account_private_key_id", ""),
+    "client_id": ("gcp_service_account_client_id", ""),
+    "auth_uri": ("gcp_service_account_auth_uri", "https://accounts.google.com/o/oauth2/auth"),
+    "token_uri": ("gcp_service_account_token_uri", "https://oauth2.googleapis.com/token"),
+    "auth_provider_x509_cert_url": ("gcp_service_account_auth_provider_x509_cert_url", "https://www.googleapis.com/oauth2/v1/certs"),
+    "client_x509_cert_url": ("gcp_service_account_client_x509_cert_url", ""),
+}
+
+def _build_flat_sa(secrets):
+    """
+    フラット形式のSecretsからサービスアカウント情報を組み立てる
+    
+    Args:
+        secrets: _secrets_snapshot() が返すプレーンなdict
+        
+    Returns:
+        dict | None: 必須項目が揃っていればサービスアカウント情報、不足していればNone
+    """
+    if not all(secrets.get(key) for key, default in _FLAT_KEY_MAP.values() if default is None):
+        return None
+    
+    info = {name: secrets.get(key, default) for name, (key, default) in _FLAT_KEY_MAP.items()}
+    # private_key の改行文字を正規化
+    if "\\n" in info["private_key"]:
+        info["private_key"] = info["private_key"].replace("\\n", "\n")
+    return info
+
+@st.cache_resource(ttl=SECRETS_TTL_SECONDS, show_spinner=False)
+def load_service_account_info():
+    """
+    Streamlit Secrets（フラット形式）からサービスアカウント情報を組み立てる（Secretsと同じ間隔で再構築）
+    
+    Returns:
+        dict: private_keyの改行を正規化済みのサービスアカウント情報
+    """
+    service_account_info = _build_flat_sa(_secrets_snapshot())
+    if service_account_info is None:
+        raise KeyError("Streamlit Secretsにgcp_service_account_*の必須項目がありません")
+    return service_account_info
+
+def main():
+    """メインアプリケーション"""
+    
+    # ログイン直後の1回だけ成功通知を表示
+    if st.session_state.pop("_just_logged_in", False):
+        st.toast("✅ 認証に成功しました！", icon="🎉")
+    
+    # タイトルとヘッダー（一番上に配置）
+    st.title("AI文字起こしサービス")
+    st.markdown("**音声ファイル・動画ファイルから高精度な日本語文字起こしを行います**")
+    
+    # タイトル画像の表示
+    if TITLE_IMAGE_EXISTS:
+        # 中央寄せで画像を表示
+        _, col2, _ = st.columns([1, 2, 1])
+        with col2:
+            st.image(_title_png_bytes(), width=300, caption="AI魔法使いコウイチくんによる文字起こし")
+    
+    st.markdown("---")  # セパレーター追加
+    
+    # 認証情報の確認（Streamlit Cloud対応強化版）
+    credentials_path = str(CREDENTIALS_PATH)
+    
+    # 🔧 シンプルなSecrets処理（Base64エラー回避版）
+    credentials_exists, use_streamlit_secrets, debug_events = detect_credentials(credentials_path)
+    
+    # 管理者向けの診断表示は ?admin=1 の場合のみ
+    is_admin = st.query_params.get("admin") == "1"
+    
     # サイドバー設定
     with st.sidebar:
         st.header("⚙️ 設定")
@@ -148,83 +414,50 @@ def main():
             if use_streamlit_secrets:
                 st.info("🔐 Streamlit Secrets使用中")
             else:
-                st.info(f"📁 認証ファイル: {os.path.basename(credentials_path)}")
+                st.info(f"📁 認証ファイル: {CREDENTIALS_PATH.name}")
         else:
             st.error("❌ サービスアカウントキーファイルが見つかりません")
             if use_streamlit_secrets:
                 st.error("**管理者へ**: Streamlit CloudのSecretsでgcp_service_accountを設定してください")
                 
-                # デバッグ情報表示
-                with st.expander("🔍 詳細デバッグ情報（管理者用）"):
-                    for info in debug_info:
-                        st.text(info)
-                    
-                    st.markdown("### ❗ 確認すべき項目")
-                    st.markdown("""
-                    1. **Streamlit Cloud Settings → Secrets** でSecretsが設定済みか？
-                    2. **[gcp_service_account]** セクションが存在するか？
-                    3. **必須フィールド** が全て含まれているか？
-                       - type, project_id, private_key, client_email
-                    4. **TOML形式** が正しいか？
-                    5. **Save** ボタンを押してアプリが再起動したか？
-                    """)
-                    
-                    st.markdown("### 🔧 緊急対処法")
-                    if st.button("🔄 アプリ強制再起動", help="Secrets設定後にアプリを強制的に再起動します"):
-                        st.info("⏳ アプリを再起動中...")
-                        st.cache_data.clear()
-                        st.cache_resource.clear()
-                        st.rerun()
-                    
-                    st.markdown("### 📋 設定用TOML内容（フラット形式推奨）")
-                    st.markdown("**セクション形式で問題がある場合は、以下のフラット形式をお試しください：**")
-                    
-                    with st.expander("🔹 フラット形式（推奨）", expanded=True):
-                        st.code('''# Google Cloud Service Account (フラット形式)
-gcp_service_account_type = "service_account"
-gcp_service_account_project_id = "<YOUR_PROJECT_ID>"
-gcp_service_account_private_key_id = "<YOUR_PRIVATE_KEY_ID>"
-gcp_service_account_private_key = "<YOUR_PRIVATE_KEY>"
-gcp_service_account_client_email = "<YOUR_CLIENT_EMAIL>"
-gcp_service_account_client_id = "<YOUR_CLIENT_ID>"
-gcp_service_account_auth_uri = "https://accounts.google.com/o/oauth2/auth"
-gcp_service_account_token_uri = "https://oauth2.googleapis.com/token"
-gcp_service_account_auth_provider_x509_cert_url = "https://www.googleapis.com/oauth2/v1/certs"
-gcp_service_account_client_x509_cert_url = "<YOUR_CERT_URL>"
-
-# その他の設定
-GCS_BUCKET_NAME = "<YOUR_GCS_BUCKET_NAME>"
-COMPANY_ACCESS_KEY = "tatsujiro25Koueki"''', language="toml")
-                    
-                    with st.expander("🔸 セクション形式（代替）"):
-                        st.code('''[gcp_service_account]
-type = "service_account"
-project_id = "<YOUR_PROJECT_ID>"
-private_key_id = "<YOUR_PRIVATE_KEY_ID>"
-private_key = "<YOUR_PRIVATE_KEY>"
-client_email = "<YOUR_CLIENT_EMAIL>"
-client_id = "<YOUR_CLIENT_ID>"
-auth_uri = "https://accounts.google.com/o/oauth2/auth"
-token_uri = "https://oauth2.googleapis.com/token"
-auth_provider_x509_cert_url = "https://www.googleapis.com/oauth2/v1/certs"
-client_x509_cert_url = "<YOUR_CERT_URL>"
-
-GCS_BUCKET_NAME = "<YOUR_GCS_BUCKET_NAME>"
-COMPANY_ACCESS_KEY = "tatsujiro25Koueki"''', language="toml")
+                # デバッグ情報表示（?admin=1 を付けた管理者アクセス時のみ描画）
+                if is_admin:
+                    # 開いたことがある場合のみ中身を描画（閉じたままの再実行では要素を送らない）
+                    with st.expander("🔍 詳細デバッグ情報（管理者用）", expanded=st.session_state.get("_dbg_open", False)):
+                        if st.toggle("デバッグ情報を表示", key="_dbg_open"):
+                            st.text(format_debug_events(debug_events))
+                        
+                            st.markdown("### ❗ 確認すべき項目")
+                            st.markdown("""
+                            1. **Streamlit Cloud Settings → Secrets** でSecretsが設定済みか？
+                            2. **[gcp_service_account]** セクションが存在するか？
+                            3. **必須フィールド** が全て含まれているか？
+                               - type, project_id, private_key, client_email
+                            4. **TOML形式** が正しいか？
+                            5. **Save** ボタンを押してアプリが再起動したか？
+                            """)
+                        
+                            st.markdown("### 🔧 緊急対処法")
+                            if st.button("🔄 アプリ強制再起動", help="Secrets設定後にアプリを強制的に再起動します"):
+                                st.info("⏳ アプリを再起動中...")
+                                st.cache_data.clear()
+                                st.cache_resource.clear()
+                                st.rerun()
+                        
+                            st.markdown("### 📋 設定用TOML内容（フラット形式推奨）")
+                            st.markdown("**セクション形式で問題がある場合は、以下のフラット形式をお試しください：**")
+                        
+                            if st.button("設定例を表示"):
+                                st.markdown("**🔹 フラット形式（推奨）**")
+                                st.code(_FLAT_TOML_EXAMPLE, language="toml")
+                                st.markdown("**🔸 セクション形式（代替）**")
+                                st.code(_SECTION_TOML_EXAMPLE, language="toml")
             else:
                 st.error(f"**管理者へ**: 以下の場所に配置してください:\n`{credentials_path}`")
         
         # GCSバケット名（環境に応じて取得）
-        # 優先順位: Streamlit Secrets > 環境変数 > デフォルト値
-        secret_bucket = ""
-        if use_streamlit_secrets:
-            try:
-                secret_bucket = st.secrets.get("GCS_BUCKET_NAME", "").strip()
-            except (KeyError, AttributeError, TypeError):
-                secret_bucket = ""
-        env_bucket = os.getenv("GCS_BUCKET_NAME", "").strip()
-        default_bucket = secret_bucket or env_bucket or DEFAULT_GCS_BUCKET
-            
+        default_bucket = _default_bucket(use_streamlit_secrets)
+        
         gcs_bucket = st.text_input(
             "GCSバケット名",
             value=default_bucket,
@@ -235,26 +468,14 @@ COMPANY_ACCESS_KEY = "tatsujiro25Koueki"''', language="toml")
         # システム情報
         with st.expander("💻 システム情報"):
             display_bucket = gcs_bucket if gcs_bucket.strip() else DEFAULT_GCS_BUCKET
-            st.markdown(f"""
-            **認証状態**: {"✅ OK" if credentials_exists else "❌ 未設定"}
-            **GCSバケット**: {display_bucket}
-            **処理方式**: 自動最適化
-            """)
+            st.markdown(_SYSTEM_INFO_TPL.format(
+                auth="✅ OK" if credentials_exists else "❌ 未設定",
+                bucket=display_bucket
+            ))
         
         # 使用方法
         with st.expander("📖 使用方法"):
-            st.markdown("""
-            1. **ファイル選択**: 音声またはビデオファイルをアップロード
-            2. **処理開始**: 「文字起こし開始」ボタンをクリック
-            3. **結果確認**: 文字起こし結果をダウンロード
-            
-            **対応形式**:
-            - 音声: WAV, MP3, FLAC, M4A, OGG
-            - 動画: MP4, AVI, MOV, MKV, WMV等
-            
-            **管理者向け**:
-            認証ファイルは `credentials/service-account-key.json` に配置してください。
-            """)
+            st.markdown(_USAGE_MD)
     
     # メイン処理エリア
     col1, col2 = st.columns([2, 1])
@@ -262,26 +483,16 @@ COMPANY_ACCESS_KEY = "tatsujiro25Koueki"''', language="toml")
     with col1:
         st.header("📁 ファイルアップロード")
         
-        # 動画処理の可用性をチェック
-        if VIDEO_PROCESSING_AVAILABLE:
-            file_types = ["wav", "mp3", "flac", "m4a", "ogg", "mp4", "avi", "mov", "mkv", "wmv", "webm"]
-            help_text = "音声ファイル・動画ファイル対応 | 最大ファイルサイズ: 500MB"
-        else:
-            file_types = ["wav", "mp3", "flac", "m4a", "ogg"]
-            help_text = "音声ファイルのみ対応（動画処理は現在利用不可）| 最大ファイルサイズ: 500MB"
-            st.warning("⚠️ 動画処理機能は現在利用できません。音声ファイルをご利用ください。")
-        
-        # ファイルアップロード
+        # ファイルアップロード（対応形式・ヘルプ文はモジュール読み込み時に決定済み）
         uploaded_file = st.file_uploader(
-            "音声ファイルを選択してください" if not VIDEO_PROCESSING_AVAILABLE else "音声ファイルまたは動画ファイルを選択してください",
-            type=file_types,
-            help=help_text
+            UPLOADER_LABEL,
+            type=list(FILE_TYPES),
+            help=HELP_TEXT
         )
         
         if uploaded_file is not None:
-            # ファイル情報表示
-            file_size_mb = len(uploaded_file.getvalue()) / (1024 * 1024)
-            is_video = uploaded_file.name.lower().endswith(('.mp4', '.avi', '.mov', '.mkv', '.wmv', '.webm'))
+            # ファイル情報表示（同じファイルのサイズ・種別はfile_id単位でセッションに保持）
+            file_size_mb, is_video, _ = get_file_meta(uploaded_file)
             
             if is_video and not VIDEO_PROCESSING_AVAILABLE:
                 st.error("❌ 動画ファイルが選択されましたが、動画処理機能は現在利用できません。音声ファイルを選択してください。")
@@ -292,7 +503,7 @@ COMPANY_ACCESS_KEY = "tatsujiro25Koueki"''', language="toml")
             
             # Streamlit Cloud メモリ制限対策
             # 無料プランでは1GBのメモリ制限があるため、大きなファイルは処理できない
-            max_file_size = 100  # MB - これ以上は処理を拒否
+            max_file_size = MAX_UPLOAD_SIZE_MB  # MB - これ以上は処理を拒否
             warning_threshold = 50  # MB - 警告を表示
             
             if file_size_mb > max_file_size:
@@ -387,42 +598,146 @@ COMPANY_ACCESS_KEY = "tatsujiro25Koueki"''', language="toml")
             elif st.session_state.processing_status == "エラー":
                 st.error("❌ 処理中にエラーが発生しました")
 
+# 文字起こし結果のキャッシュ（同じファイルの再アップロード時に再処理しない）
+TRANSCRIPT_CACHE_MAX_ENTRIES = 32
+
+# アップロードを一時ファイルへ書き出す際のブロックサイズ（4MB）
+UPLOAD_COPY_BLOCK_SIZE = 4 * 1024 * 1024
+
+@st.cache_resource
+def _transcript_cache():
+    """プロセス共有の文字起こし結果キャッシュ（LRU）とロック"""
+    return OrderedDict(), threading.Lock()
+
+# st.write_stream はMarkdownとして描画するため、文字起こし結果中の記号はエスケープする
+_MARKDOWN_SPECIAL = re.compile(r"([\\`*_{}\[\]()#+\-.!|<>~$])")
+
+def escape_markdown(text):
+    """文字起こし結果をMarkdownとして解釈されないようエスケープ"""
+    return _MARKDOWN_SPECIAL.sub(r"\\\1", text)
+
+def transcript_cache_key(uploaded_file, chunk_length_ms, gcs_bucket):
+    """
+    文字起こし結果のキャッシュキーを生成
+    
+    ファイル内容はgetbuffer()のメモリビューから直接ハッシュ化し、コピーを作りません。
+    """
+    with uploaded_file.getbuffer() as buffer:
+        digest = hashlib.blake2b(buffer, digest_size=16).hexdigest()
+    return (digest, uploaded_file.size, chunk_length_ms, gcs_bucket)
+
+def get_cached_transcript(cache_key):
+    """キャッシュ済みの文字起こし結果を取得（無ければNone）"""
+    cache, lock = _transcript_cache()
+    with lock:
+        result = cache.get(cache_key)
+        if result is not None:
+            cache.move_to_end(cache_key)
+        return result
+
+def store_cached_transcript(cache_key, result):
+    """文字起こし結果をキャッシュに保存（上限を超えたら古いものから削除）"""
+    cache, lock = _transcript_cache()
+    with lock:
+        cache[cache_key] = result
+        cache.move_to_end(cache_key)
+        while len(cache) > TRANSCRIPT_CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+
 def process_transcription(uploaded_file, credentials_path, gcs_bucket, chunk_length_ms, use_streamlit_secrets=False):
     """文字起こし処理の実行"""
     
+    status = None
+    future = None
+    # 作業用一時ディレクトリは成功・失敗にかかわらず finally で削除する
+    cleanup = contextlib.ExitStack()
     try:
         st.session_state.processing_status = "処理中"
         
-        # プログレスバーと状況表示
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        # 一時ファイルとして保存
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            input_file_path = tmp_file.name
+        # プログレスバーと状況表示（st.status内にまとめ、進捗ごとの更新をこの領域に限定）
+        status = st.status("🔄 文字起こし中...", expanded=True)
+        with status:
+            progress_bar = st.progress(0)
+            status_text = st.empty()
         
-        # 認証ファイルは固定パスを使用
-        # credentials_pathは既に渡されている
-        
-        status_text.text("🔄 初期化中...")
-        progress_bar.progress(10)
-        
-        # 非同期処理を実行
-        result = asyncio.run(async_transcribe(
-            input_file_path, 
-            credentials_path, 
-            gcs_bucket, 
-            chunk_length_ms,
-            progress_bar,
-            status_text,
-            use_streamlit_secrets
-        ))
+        # 同一ファイル・同一設定の結果はキャッシュから返す（GCSアップロードとAPI呼び出しを省略）
+        cache_key = transcript_cache_key(uploaded_file, chunk_length_ms, gcs_bucket)
+        result = get_cached_transcript(cache_key)
+        input_file_path = None
+        if result is not None:
+            logger.info("キャッシュ済みの文字起こし結果を使用: %s", uploaded_file.name)
+        else:
+            # リクエストごとの作業ディレクトリ（入力ファイル・動画から抽出した音声をまとめて置く）
+            work_dir = cleanup.enter_context(tempfile.TemporaryDirectory(prefix="moji_"))
+            
+            # 一時ファイルとして保存
+            input_file_path = os.path.join(work_dir, "input" + Path(uploaded_file.name).suffix)
+            with open(input_file_path, "wb") as tmp_file:
+                # バッファ全体のコピーを避けるためブロック単位でストリーム書き込み
+                uploaded_file.seek(0)
+                shutil.copyfileobj(uploaded_file, tmp_file, length=UPLOAD_COPY_BLOCK_SIZE)
+            
+            # 認証ファイルは固定パスを使用
+            # credentials_pathは既に渡されている
+            
+            status_text.text("🔄 初期化中...")
+            progress_bar.progress(10)
+            
+            # 非同期処理を常駐イベントループで実行
+            # UI更新はスクリプトスレッドから行う必要があるため、キュー経由で受け取って反映する
+            updates = queue.Queue()
+            last_progress = [10, "🔄 初期化中..."]
+            
+            def apply_progress(update):
+                # 表示が変わらない更新は送らない（WebSocketへのフレーム送信を抑える）
+                percent, message = update
+                if message != last_progress[1]:
+                    status.update(label=message, state="running")
+                    status_text.text(message)
+                    last_progress[1] = message
+                if percent != last_progress[0]:
+                    progress_bar.progress(percent)
+                    last_progress[0] = percent
+            
+            future = asyncio.run_coroutine_threadsafe(async_transcribe(
+                input_file_path, 
+                credentials_path, 
+                gcs_bucket, 
+                chunk_length_ms,
+                lambda percent, message: updates.put(("progress", (percent, message))),
+                use_streamlit_secrets,
+                # チャンクごとに段落を分ける（単一の改行はMarkdownでは同じ段落として連結される）
+                report_transcript=lambda transcript: updates.put(("transcript", escape_markdown(transcript) + "\n\n")),
+                work_dir=work_dir
+            ), get_event_loop())
+            
+            def stream_transcript():
+                # 進捗は反映しつつ、完了したチャンクの文字起こし結果を順に流す
+                while True:
+                    try:
+                        kind, payload = updates.get(timeout=0.1)
+                    except queue.Empty:
+                        if future.done() and updates.empty():
+                            return
+                        continue
+                    if kind == "progress":
+                        apply_progress(payload)
+                    else:
+                        yield payload
+            
+            # 途中結果はst.status内に逐次表示（完了後は下の結果欄に全文を表示）
+            with status:
+                st.write_stream(stream_transcript())
+            
+            result = future.result()
+            if result:
+                store_cached_transcript(cache_key, result)
         
         if result:
             st.session_state.processing_status = "完了"
             progress_bar.progress(100)
             status_text.text("✅ 処理完了！")
+            status.update(label="✅ 処理完了！", state="complete", expanded=False)
             
             # 結果表示
             st.header("📄 文字起こし結果")
@@ -441,15 +756,14 @@ def process_transcription(uploaded_file, credentials_path, gcs_bucket, chunk_len
             )
         else:
             st.session_state.processing_status = "エラー"
+            status.update(label="❌ 文字起こし処理に失敗しました", state="error")
             st.error("❌ 文字起こし処理に失敗しました")
             st.error("💡 **管理者向け**: ログを確認して詳細な原因を特定してください")
         
-        # 一時ファイルを削除
-        os.unlink(input_file_path)
-        # credentials_pathは固定ファイルなので削除しない
-        
     except (RuntimeError, ValueError, OSError) as e:
         st.session_state.processing_status = "エラー"
+        if status is not None:
+            status.update(label="❌ 処理エラー", state="error")
         st.error(f"❌ **処理エラー**: {str(e)}")
         
         # 詳細なエラー情報を表示
@@ -457,20 +771,34 @@ def process_transcription(uploaded_file, credentials_path, gcs_bucket, chunk_len
             st.error(f"**エラータイプ**: {type(e).__name__}")
             st.error(f"**エラーメッセージ**: {str(e)}")
             st.error(f"**ファイル**: {uploaded_file.name}")
-            st.error(f"**ファイルサイズ**: {len(uploaded_file.getvalue()) / (1024 * 1024):.2f}MB")
+            st.error(f"**ファイルサイズ**: {uploaded_file.size / (1024 * 1024):.2f}MB")
             st.error(f"**認証方式**: {'Streamlit Secrets' if use_streamlit_secrets else 'ローカルファイル'}")
             st.error(f"**GCSバケット**: {gcs_bucket}")
             
         logger.error("文字起こし処理エラー: %s: %s", type(e).__name__, str(e))
         logger.error("詳細トレースバック: %s", traceback.format_exc())
+    finally:
+        # 再実行・停止（RerunException/StopException）で抜けた場合は常駐ループ上の処理も中断する
+        if future is not None and not future.done():
+            future.cancel()
+        # credentials_pathは固定ファイルなので削除しない
+        cleanup.close()
 
-async def async_transcribe(input_file_path, credentials_path, gcs_bucket, chunk_length_ms, progress_bar, status_text, use_streamlit_secrets=False):
-    """非同期文字起こし処理"""
+async def async_transcribe(input_file_path, credentials_path, gcs_bucket, chunk_length_ms, report_progress, use_streamlit_secrets=False, report_transcript=None, work_dir=None):
+    """
+    非同期文字起こし処理
+    
+    常駐イベントループのスレッドで実行されるため、Streamlitの要素は直接操作せず
+    report_progress(進捗率, メッセージ) で進捗を、report_transcript(文字列) で
+    完了したチャンクの文字起こし結果（チャンク順）を通知します。
+    動画から抽出した音声は work_dir（呼び出し側が削除する作業ディレクトリ）に出力します。
+    """
     
     try:
-        # ファイルタイプを判定
-        file_extension = Path(input_file_path).suffix.lower()
-        is_video = file_extension in ['.mp4', '.avi', '.mov', '.mkv', '.wmv', '.webm']
+        # ファイルタイプを判定（拡張子ではなく先頭のマジックバイトで判定）
+        with open(input_file_path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+        is_video = is_video_content(head, Path(input_file_path).suffix.lower())
         
         audio_file_path = input_file_path
         
@@ -479,101 +807,69 @@ async def async_transcribe(input_file_path, credentials_path, gcs_bucket, chunk_
             if not VIDEO_PROCESSING_AVAILABLE:
                 raise RuntimeError("動画処理機能が利用できません。必要なライブラリ（moviepy/opencv）がインストールされていない可能性があります。")
             
-            status_text.text("🎬 動画から音声を抽出中...")
-            progress_bar.progress(20)
+            report_progress(20, "🎬 動画から音声を抽出中...")
             
-            # 追加の安全チェック
-            runtime_video_processor = VideoProcessor()
-            if not runtime_video_processor.video_processing_available:
+            # 追加の安全チェック（実際にインポートできるかをキャッシュ済みの結果で確認）
+            if not video_available():
                 raise RuntimeError("動画処理ライブラリが実行時に利用できません（moviepy/opencv未インストール）")
-            audio_file_path = await runtime_video_processor.process_video_for_transcription(input_file_path)
+            audio_file_path = await get_video_processor().process_video_for_transcription(
+                input_file_path, output_dir=work_dir
+            )
             
             if not audio_file_path:
                 raise RuntimeError("動画からの音声抽出に失敗しました")
         
         # 音声文字起こしサービスを初期化
-        status_text.text("🤖 文字起こしサービス初期化中...")
-        progress_bar.progress(30)
-        
-        # 🔧 シンプルな認証方式選択（Base64エラー回避版 + RSA警告抑制）
-        import warnings
-        
-        # RSA警告を抑制（Google認証の不完全なキーファイル警告）
-        warnings.filterwarnings('ignore', message='You have provided a malformed keyfile')
+        report_progress(30, "🤖 文字起こしサービス初期化中...")
         
+        # 🔧 シンプルな認証方式選択（Base64エラー回避版）
+        # どちらの方式でもサービスは get_transcription_service でプロセス内キャッシュされる
         speech_location = DEFAULT_SPEECH_LOCATION
-        if use_streamlit_secrets:
-            speech_location = st.secrets.get("gcp_speech_location", DEFAULT_SPEECH_LOCATION)
-        logger.info("Speech-to-Text リージョン設定: %s", speech_location)
-
+        service_account_info = None
+        credentials_key = credentials_path
         if use_streamlit_secrets:
             # Streamlit Cloud環境：Secretsから認証情報を取得
             logger.info("Streamlit Secrets認証を使用")
+            speech_location = _secrets_snapshot().get("gcp_speech_location", DEFAULT_SPEECH_LOCATION)
             try:
-                # シンプルなSecrets取得（フラット形式のみ）
-                # private_key の改行文字を正規化
-                private_key = st.secrets["gcp_service_account_private_key"]
-                if "\\n" in private_key:
-                    private_key = private_key.replace("\\n", "\n")
-                
-                service_account_info = {
-                    "type": st.secrets["gcp_service_account_type"],
-                    "project_id": st.secrets["gcp_service_account_project_id"],
-                    "private_key": private_key,
-                    "client_email": st.secrets["gcp_service_account_client_email"],
-                    "private_key_id": st.secrets.get("gcp_service_account_private_key_id", ""),
-                    "client_id": st.secrets.get("gcp_service_account_client_id", ""),
-                    "auth_uri": st.secrets.get("gcp_service_account_auth_uri", "https://accounts.google.com/o/oauth2/auth"),
-                    "token_uri": st.secrets.get("gcp_service_account_token_uri", "https://oauth2.googleapis.com/token"),
-                    "auth_provider_x509_cert_url": st.secrets.get("gcp_service_account_auth_provider_x509_cert_url", "https://www.googleapis.com/oauth2/v1/certs"),
-                    "client_x509_cert_url": st.secrets.get("gcp_service_account_client_x509_cert_url", "")
-                }
+                # シンプルなSecrets取得（フラット形式のみ・プロセス内でキャッシュ）
+                service_account_info = load_service_account_info()
                 
                 # 認証情報の検証（デバッグ用）
                 logger.info("認証情報検証 - Project ID: %s", service_account_info["project_id"])
                 logger.info("認証情報検証 - Client Email: %s", service_account_info["client_email"])
                 
-                transcription_service = AudioTranscriptionService(
-                    service_account_info=service_account_info,
-                    gcs_bucket_name=gcs_bucket,
-                    location=speech_location
-                )
+                credentials_key = credentials_fingerprint(service_account_info)
             except (KeyError, ValueError, TypeError) as e:
                 logger.error("Streamlit Secrets認証エラー: %s", e)
                 raise RuntimeError(f"Streamlit Secrets認証に失敗しました: {str(e)}") from e
         else:
             # ローカル環境：ファイルから認証
             logger.info("ローカルファイル認証を使用")
-            transcription_service = AudioTranscriptionService(
-                service_account_path=credentials_path,
-                gcs_bucket_name=gcs_bucket,
-                location=speech_location
-            )
+        logger.info("Speech-to-Text リージョン設定: %s", speech_location)
         
-        # 出力用の一時ファイル
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".txt", mode='w') as output_file:
-            output_file_path = output_file.name
+        transcription_service = get_transcription_service(
+            gcs_bucket,
+            credentials_key,
+            speech_location,
+            _service_account_info=service_account_info,
+            service_account_path=None if service_account_info else credentials_path
+        )
         
-        # 文字起こし処理実行
-        status_text.text("🎙️ 文字起こし処理中...")
-        progress_bar.progress(50)
+        # 文字起こし処理実行（結果はファイルを経由せず文字列で受け取る）
+        report_progress(50, "🎙️ 文字起こし処理中...")
         
-        success = await transcription_service.process_audio_transcription(
+        result = await transcription_service.process_audio_transcription_to_string(
             audio_path=audio_file_path,
-            output_path=output_file_path,
-            chunk_length_ms=chunk_length_ms
+            chunk_length_ms=chunk_length_ms,
+            # チャンク完了ごとに 50% → 95% の範囲で進捗を進める
+            progress_callback=lambda done, total: report_progress(
+                50 + 45 * done // total, f"🎙️ 文字起こし処理中... ({done}/{total}チャンク完了)"
+            ),
+            transcript_callback=report_transcript
         )
         
-        if success:
-            # 結果を読み込み
-            with open(output_file_path, 'r', encoding='utf-8') as f:
-                result = f.read()
-            
-            # 一時ファイルを削除
-            os.unlink(output_file_path)
-            if is_video and audio_file_path != input_file_path:
-                os.unlink(audio_file_path)
-            
+        if result:
             return result
         else:
             logger.error("音声ファイル処理結果が空です")
@@ -587,6 +883,49 @@ async def async_transcribe(input_file_path, credentials_path, gcs_bucket, chunk_
         logger.error("非同期文字起こしエラー: %s", str(e))
         return None
 
+# ファイルサイズ（MB）に応じたチャンク長テーブル: (閾値, [(チャンク長ms, ログレベル, ログ文言), ...])
+# Streamlit Cloud のメモリ制限（1GB）に対応するため、大きいファイルほど短いチャンクを使う
+_VIDEO_CHUNK_TABLE = (
+    (30, 70),
+    (
+        (3 * 60 * 1000, logging.INFO, "小動画検出 (%.1fMB) -> 3分チャンク"),
+        (2 * 60 * 1000, logging.INFO, "中動画検出 (%.1fMB) -> 2分チャンク"),
+        (60 * 1000, logging.WARNING, "大動画検出 (%.1fMB) -> 1分チャンク（メモリ制限対策）"),
+    ),
+)
+_AUDIO_CHUNK_TABLE = (
+    (20, 50, 80),
+    (
+        (5 * 60 * 1000, logging.INFO, "小ファイル検出 (%.1fMB) -> 5分チャンク"),
+        (3 * 60 * 1000, logging.INFO, "中ファイル検出 (%.1fMB) -> 3分チャンク"),
+        (2 * 60 * 1000, logging.WARNING, "大ファイル検出 (%.1fMB) -> 2分チャンク（メモリ制限対策）"),
+        (60 * 1000, logging.WARNING, "特大ファイル検出 (%.1fMB) -> 1分チャンク（メモリ制限対策）"),
+    ),
+)
+
+def get_file_meta(uploaded_file):
+    """
+    アップロードファイルのサイズ・種別を取得（file_id単位でセッションに保持し、再実行時は再計算しない）
+    
+    Args:
+        uploaded_file: Streamlitアップロードファイルオブジェクト
+        
+    Returns:
+        Tuple[float, bool, str]: (ファイルサイズMB, 動画ファイルかどうか, 小文字の拡張子)
+    """
+    file_meta = st.session_state.setdefault("_file_meta", {})
+    meta = file_meta.get(uploaded_file.file_id)
+    if meta is None:
+        extension = Path(uploaded_file.name).suffix.lower()
+        # 先頭バイトだけを読み、ファイル全体はコピーしない
+        uploaded_file.seek(0)
+        head = uploaded_file.read(SNIFF_BYTES)
+        uploaded_file.seek(0)
+        # UploadedFile.size はバッファ全体のコピーを作らずにサイズを返す
+        meta = (uploaded_file.size / (1024 * 1024), is_video_content(head, extension), extension)
+        file_meta[uploaded_file.file_id] = meta
+    return meta
+
 def calculate_optimal_chunk_length(uploaded_file, is_video: bool = False):
     """
     アップロードされたファイルに基づいて最適なチャンク長を自動計算
@@ -601,48 +940,45 @@ def calculate_optimal_chunk_length(uploaded_file, is_video: bool = False):
     Returns:
         int: チャンク長（ミリ秒）
     """
-    # ファイルサイズを取得（MB単位）
-    file_size_mb = len(uploaded_file.getvalue()) / (1024 * 1024)
-    
-    # 動画の場合は、より慎重なチャンク設定
-    if is_video:
-        if file_size_mb < 30:
-            chunk_length_ms = 3 * 60 * 1000  # 3分チャンク
-            logger.info("小動画検出 (%.1fMB) -> 3分チャンク", file_size_mb)
-        elif file_size_mb < 70:
-            chunk_length_ms = 2 * 60 * 1000  # 2分チャンク
-            logger.info("中動画検出 (%.1fMB) -> 2分チャンク", file_size_mb)
-        else:
-            chunk_length_ms = 60 * 1000      # 1分チャンク
-            logger.warning("大動画検出 (%.1fMB) -> 1分チャンク（メモリ制限対策）", file_size_mb)
-    else:
-        # 音声ファイルの場合（Streamlit Cloud最適化版）
-        if file_size_mb < 20:
-            chunk_length_ms = 5 * 60 * 1000  # 5分チャンク（小ファイル）
-            logger.info("小ファイル検出 (%.1fMB) -> 5分チャンク", file_size_mb)
-        elif file_size_mb < 50:
-            chunk_length_ms = 3 * 60 * 1000  # 3分チャンク
-            logger.info("中ファイル検出 (%.1fMB) -> 3分チャンク", file_size_mb)
-        elif file_size_mb < 80:
-            chunk_length_ms = 2 * 60 * 1000  # 2分チャンク
-            logger.warning("大ファイル検出 (%.1fMB) -> 2分チャンク（メモリ制限対策）", file_size_mb)
-        else:
-            chunk_length_ms = 60 * 1000      # 1分チャンク（最小）
-            logger.warning("特大ファイル検出 (%.1fMB) -> 1分チャンク（メモリ制限対策）", file_size_mb)
+    # ファイルサイズを取得（MB単位・セッションに保持済みの値を再利用）
+    file_size_mb = get_file_meta(uploaded_file)[0]
+    
+    # 閾値テーブルを二分探索して該当する区分を選ぶ（動画は、より慎重なチャンク設定）
+    thresholds, table = _VIDEO_CHUNK_TABLE if is_video else _AUDIO_CHUNK_TABLE
+    chunk_length_ms, level, message = table[bisect.bisect_right(thresholds, file_size_mb)]
+    logger.log(level, message, file_size_mb)
     
     return chunk_length_ms
 
-def check_company_access():
-    """社内専用アクセス認証"""
+@st.cache_data
+def _login_css():
+    """ログイン画面用CSS（assets/login.css）を1度だけ読み込む"""
+    return LOGIN_CSS_PATH.read_text(encoding="utf-8")
+
+# ログイン画面のタイトル・サブタイトルHTML
+_LOGIN_TITLE_HTML = (
+    '<h1 class="login-title">AI文字起こし</h1>'
+    '<h3 class="login-subtitle">（テスト版）</h3>'
+)
+
+# ログイン画面の静的HTML（社内専用アクセス見出し・区切り線・アクセスキーラベル）
+_LOGIN_STATIC_HTML = (
+    '<p><strong>🔐 社内専用アクセス</strong></p>'
+    '<hr>'
+    '<p class="access-key-label">🔑 アクセスキーを入力してください</p>'
+)
+
+@st.cache_resource(ttl=SECRETS_TTL_SECONDS)
+def _access_key_digest():
+    """
+    アクセスキーを解決してSHA-256ダイジェストを返す（未設定ならNone）
     
+    Secretsと同じ間隔で再計算し、失効したアクセスキーを使い続けないようにします。
+    
+    優先順位: Streamlit Secrets > 環境変数 > デフォルト値
+    """
     # アクセスキー（環境に応じて取得）
-    access_key_for_auth = ""
-    try:
-        # Secrets環境かどうかをチェック
-        if hasattr(st, 'secrets') and len(st.secrets) > 0:
-            access_key_for_auth = st.secrets.get("COMPANY_ACCESS_KEY", "").strip()
-    except (AttributeError, KeyError, TypeError):
-        access_key_for_auth = ""
+    access_key_for_auth = str(_secrets_snapshot().get("COMPANY_ACCESS_KEY", "")).strip()
 
     # Secretsに無い場合は環境変数を参照
     if not access_key_for_auth:
@@ -653,253 +989,169 @@ def check_company_access():
         access_key_for_auth = DEFAULT_COMPANY_ACCESS_KEY
 
     if not access_key_for_auth:
+        return None
+    return hashlib.sha256(access_key_for_auth.encode("utf-8")).digest()
+
+@st.cache_resource
+def _rate_limiter():
+    """プロセス共有のログイン失敗記録（IP/セッションのキー -> (失敗回数, 初回失敗時刻)）とロック"""
+    return OrderedDict(), threading.Lock()
+
+def _trusted_proxy_hops():
+    """
+    信頼済みプロキシの段数を取得（優先順位: Streamlit Secrets > 環境変数 > 1）
+    
+    不正な値の場合は X-Forwarded-For を使わない（0）として扱います。
+    """
+    hops = str(_secrets_snapshot().get("TRUSTED_PROXY_HOPS", DEFAULT_TRUSTED_PROXY_HOPS)).strip()
+    try:
+        return max(0, int(hops))
+    except ValueError:
+        logger.warning("TRUSTED_PROXY_HOPS が不正な値です: %s", hops)
+        return 0
+
+def _client_ip():
+    """
+    リクエスト元IP。取得できない場合は空文字
+    
+    X-Forwarded-For の先頭側はクライアントが自由に指定できるため、
+    信頼済みプロキシの段数（TRUSTED_PROXY_HOPS）だけ末尾から数えた値を使います。
+    （例: CDN → LB → アプリ の構成では 2）
+    """
+    hops = _trusted_proxy_hops()
+    context = getattr(st, "context", None)
+    if context is None or hops == 0:
+        return ""
+    entries = [entry.strip() for entry in context.headers.get("X-Forwarded-For", "").split(",")]
+    entries = [entry for entry in entries if entry]
+    if len(entries) < hops:
+        return ""
+    return entries[-hops]
+
+def _rate_limit_key():
+    """
+    ログイン失敗制限のキー
+    
+    IPを取得できない場合（直接公開の構成など）も制限を無効にせず、セッション単位で数えます。
+    """
+    client_ip = _client_ip()
+    if client_ip:
+        return f"ip:{client_ip}"
+    session_id = st.session_state.setdefault("_rate_limit_session", uuid.uuid4().hex)
+    return f"session:{session_id}"
+
+def _is_rate_limited(key):
+    """直近のウィンドウ内で失敗回数が上限を超えているか"""
+    failures, lock = _rate_limiter()
+    with lock:
+        entry = failures.get(key)
+        if entry is None:
+            return False
+        count, first_ts = entry
+        if time.monotonic() - first_ts > LOGIN_RATE_LIMIT_WINDOW_SEC:
+            del failures[key]
+            return False
+        return count > LOGIN_RATE_LIMIT_MAX_FAILURES
+
+def _record_failed_login(key):
+    """ログイン失敗を記録（ウィンドウ経過後はリセット、記録数は上限付きLRU）"""
+    failures, lock = _rate_limiter()
+    now = time.monotonic()
+    with lock:
+        count, first_ts = failures.get(key, (0, now))
+        if now - first_ts > LOGIN_RATE_LIMIT_WINDOW_SEC:
+            count, first_ts = 0, now
+        failures[key] = (count + 1, first_ts)
+        failures.move_to_end(key)
+        while len(failures) > LOGIN_RATE_LIMIT_MAX_CLIENTS:
+            failures.popitem(last=False)
+
+def check_company_access():
+    """社内専用アクセス認証"""
+    
+    # 認証済みのセッションはログイン画面の構築を丸ごと省略
+    if st.session_state.get("authenticated", False):
+        return
+    
+    # 同一IP（取得できない場合は同一セッション）からの失敗が多すぎる場合はログイン画面を構築せずに停止
+    rate_limit_key = _rate_limit_key()
+    if _is_rate_limited(rate_limit_key):
+        st.error("⚠️ ログイン試行回数が多すぎます。しばらく時間をおいてから再度お試しください。")
+        st.stop()
+    
+    # アクセスキーのダイジェスト（プロセス内で1度だけ解決）
+    access_key_digest = _access_key_digest()
+    if access_key_digest is None:
         st.error("❌ アクセスキーが設定されていません。環境変数またはStreamlit SecretsにCOMPANY_ACCESS_KEYを設定してください。")
         st.stop()
     
-    # セッション状態の初期化
-    if 'authenticated' not in st.session_state:
-        st.session_state.authenticated = False
-        st.session_state.login_attempts = 0
-    
-    if not st.session_state.authenticated:
-        # 認証画面のスタイル設定（紫色ブロック完全削除版）
-        st.markdown("""
-        <style>
-        /* Streamlit上部バーと紫色要素を完全削除 */
-        .stApp > header[data-testid="stHeader"] {
-            display: none !important;
-        }
-        
-        /* プログレスバーを非表示 */
-        .stProgress {
-            display: none !important;
-        }
-        
-        /* メインコンテナの上部パディング削除 */
-        .main .block-container {
-            padding-top: 0rem !important;
-            max-width: 100% !important;
-        }
-        
-        /* Streamlitのデフォルト背景削除 */
-        .stApp {
-            background-color: #f0f2f6 !important;
-        }
-        
-        /* 上部の余白を完全削除 */
-        section.main > div {
-            padding-top: 0rem !important;
-        }
-        
-        /* 紫色の要素を強制的に非表示 */
-        div[style*="background-color: rgb(106, 92, 231)"] {
-            display: none !important;
-        }
-        
-        div[style*="background: linear-gradient"] {
-            display: none !important;
-        }
-        
-        /* Streamlitのメニューボタンを非表示 */
-        button[kind="header"] {
-            display: none !important;
-        }
-        
-        /* Streamlitのデプロイボタンも非表示 */
-        .stDeployButton {
-            display: none !important;
-        }
-        
-        /* その他の紫色系要素を非表示 */
-        div[data-testid="stSidebar"] {
-            display: none !important;
-        }
-        
-        /* ツールバーを非表示 */
-        .stToolbar {
-            display: none !important;
-        }
-        
-        /* ログインコンテナ（横幅拡大版） */
-        .login-container {
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 2rem;
-            border-radius: 12px;
-            box-shadow: 0 8px 16px rgba(0, 0, 0, 0.15);
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-        }
-        
-        /* タイトルスタイル（横幅拡大対応） */
-        .login-title {
-            text-align: left;
-            font-size: 2.2rem;
-            margin-bottom: 0.2rem;
-            color: white;
-            font-weight: bold;
-        }
-        
-        /* サブタイトルスタイル */
-        .login-subtitle {
-            text-align: left;
-            font-size: 0.9rem;
-            margin-bottom: 0.5rem;
-            color: #ff6b6b;
-            font-weight: bold;
-        }
-        
-        /* 左側画像のスタイル */
-        .login-image-left {
-            text-align: center;
-            margin-top: 0.5rem;
-        }
-        
-        /* 右側タイトルのスタイル */
-        .login-title-right {
-            padding-left: 1rem;
-            padding-top: 1rem;
-        }
-        
-        /* アクセスキーラベルのスタイル */
-        .access-key-label {
-            color: black;
-            background-color: rgba(255, 255, 255, 0.9);
-            font-weight: bold;
-            font-size: 1.1rem;
-            margin-bottom: 0.5rem;
-            text-align: center;
-            padding: 8px 12px;
-            border-radius: 6px;
-            border: 1px solid #ddd;
-        }
-        
-        /* 入力欄のスタイル改善 */
-        .stTextInput > div > div > input {
-            background-color: white !important;
-            color: black !important;
-            border: 2px solid #4CAF50 !important;
-            border-radius: 8px !important;
-            padding: 12px !important;
-            font-size: 1rem !important;
-            font-weight: 500 !important;
-        }
-        
-        .stTextInput > div > div > input::placeholder {
-            color: #666666 !important;
-            font-style: italic;
-        }
-        
-        /* フォーカス時のスタイル */
-        .stTextInput > div > div > input:focus {
-            border-color: #45a049 !important;
-            box-shadow: 0 0 8px rgba(76, 175, 80, 0.3) !important;
-        }
-        
-        /* 画像センター寄せ（強化版） */
-        .login-image {
-            text-align: center;
-            margin: 0.5rem 0;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-        }
-        
-        /* 画像自体のスタイル */
-        .login-image img {
-            display: block;
-            margin: 0 auto;
-        }
-        
-        /* テキスト入力フィールド */
-        .stTextInput > div > div > input {
-            background-color: rgba(255, 255, 255, 0.1);
-            color: white;
-            border: 1px solid rgba(255, 255, 255, 0.3);
-        }
-        
-        /* ページ全体の上部マージン削除 */
-        .block-container {
-            padding-top: 1rem !important;
-            padding-bottom: 1rem !important;
-        }
-        </style>
-        """, unsafe_allow_html=True)
+    # セッション状態の初期化（未設定のキーのみ・既存の値は上書きしない）
+    for key, default in (("authenticated", False), ("login_attempts", 0)):
+        st.session_state.setdefault(key, default)
+    
+    # 認証画面のスタイル設定（紫色ブロック完全削除版・assets/login.css）
+    st.markdown(f"<style>{_login_css()}</style>", unsafe_allow_html=True)
+    
+    # ログインフォーム（中央寄せは .login-container の max-width / margin で行う）
+    st.markdown('<div class="login-container">', unsafe_allow_html=True)
+    
+    # 魔法使い画像とタイトルを横並び表示
+    if TITLE_IMAGE_EXISTS:
+        # 画像とタイトルのカラム分割（横幅拡大対応）
+        img_col, title_col = st.columns([1, 3])
         
-        # 中央寄せのログインフォーム（横幅拡大版）
-        _, col2, _ = st.columns([0.5, 3, 0.5])
+        with img_col:
+            st.image(_title_png_bytes(), width=150)
         
-        with col2:
-            st.markdown('<div class="login-container">', unsafe_allow_html=True)
-            
-            # 魔法使い画像とタイトルを横並び表示
-            title_image_path = os.path.join(os.path.dirname(__file__), "assets", "title_wizard.png")
-            if os.path.exists(title_image_path):
-                # 画像とタイトルのカラム分割（横幅拡大対応）
-                img_col, title_col = st.columns([1, 3])
-                
-                with img_col:
-                    st.markdown('<div class="login-image-left">', unsafe_allow_html=True)
-                    st.image(title_image_path, width=150)
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                with title_col:
-                    st.markdown('<div class="login-title-right">', unsafe_allow_html=True)
-                    st.markdown('<h1 class="login-title">AI文字起こし</h1>', unsafe_allow_html=True)
-                    st.markdown('<h3 class="login-subtitle">（テスト版）</h3>', unsafe_allow_html=True)
-                    st.markdown('</div>', unsafe_allow_html=True)
-            else:
-                # 画像がない場合はセンター表示
-                st.markdown('<h1 class="login-title">AI文字起こし</h1>', unsafe_allow_html=True)
-                st.markdown('<h3 class="login-subtitle">（テスト版）</h3>', unsafe_allow_html=True)
-            
-            st.markdown("**🔐 社内専用アクセス**")
-            st.markdown("---")
-            
-            # アクセスキー入力（見やすく改良）
-            st.markdown('<p class="access-key-label">🔑 アクセスキーを入力してください</p>', unsafe_allow_html=True)
-            access_key = st.text_input(
-                "アクセスキー",
-                type="password",
-                placeholder="社内配布されたキーを入力",
-                help="社内で配布されているアクセスキーを入力してください",
-                key="access_key_input",
-                label_visibility="collapsed"
-            )
-            
-            # ログインボタン
-            _, col_btn2, _ = st.columns([1, 2, 1])
-            with col_btn2:
-                login_button = st.button("🚀 ログイン", use_container_width=True, type="primary")
-            
-            if login_button:
-                if access_key == access_key_for_auth:
-                    st.session_state.authenticated = True
-                    st.success("✅ 認証に成功しました！")
-                    st.balloons()  # お祝い効果
-                    import time
-                    time.sleep(1)
-                    st.rerun()
-                else:
-                    st.session_state.login_attempts += 1
-                    st.error("❌ アクセスキーが正しくありません")
-                    
-                    # 試行回数制限
-                    if st.session_state.login_attempts >= 5:
-                        st.error("⚠️ 試行回数が上限に達しました。管理者にお問い合わせください。")
-                        st.stop()
-            
-            # 試行回数表示
-            if st.session_state.login_attempts > 0:
-                remaining = 5 - st.session_state.login_attempts
-                st.warning(f"残り試行回数: {remaining}回")
+        with title_col:
+            st.markdown(f'<div class="login-title-right">{_LOGIN_TITLE_HTML}</div>', unsafe_allow_html=True)
+    else:
+        # 画像がない場合はセンター表示
+        st.markdown(_LOGIN_TITLE_HTML, unsafe_allow_html=True)
+    
+    # 社内専用アクセスの見出し・区切り線・アクセスキーラベル（1回のmarkdownで描画）
+    st.markdown(_LOGIN_STATIC_HTML, unsafe_allow_html=True)
+    
+    # アクセスキー入力とログインボタン（フォームにまとめ、送信時のみ再実行）
+    with st.form("login_form", clear_on_submit=False):
+        access_key = st.text_input(
+            "アクセスキー",
+            type="password",
+            placeholder="社内配布されたキーを入力",
+            help="社内で配布されているアクセスキーを入力してください",
+            key="access_key_input",
+            label_visibility="collapsed"
+        )
+        login_button = st.form_submit_button("🚀 ログイン", type="primary")
+    
+    if login_button:
+        # 定数時間比較（固定長のダイジェスト同士を比較）
+        user_digest = hashlib.sha256(access_key.encode("utf-8")).digest()
+        if hmac.compare_digest(user_digest, access_key_digest):
+            st.session_state.authenticated = True
+            # 成功メッセージは再実行後のメイン画面でトースト表示する
+            st.session_state["_just_logged_in"] = True
+            st.rerun()
+        else:
+            st.session_state.login_attempts += 1
+            _record_failed_login(rate_limit_key)
+            st.error("❌ アクセスキーが正しくありません")
             
-            st.markdown("---")
-            st.info("💡 アクセスキーは社内管理者から取得してください")
-            st.markdown('</div>', unsafe_allow_html=True)
-        
-        # ここで処理を停止（認証されるまでメインアプリを表示しない）
-        st.stop()
+            # 試行回数制限
+            if st.session_state.login_attempts >= MAX_LOGIN_ATTEMPTS:
+                st.error("⚠️ 試行回数が上限に達しました。管理者にお問い合わせください。")
+                st.stop()
+    
+    # 試行回数表示
+    if st.session_state.login_attempts > 0:
+        st.warning(_REMAINING_MSGS[min(st.session_state.login_attempts, MAX_LOGIN_ATTEMPTS)])
+    
+    st.markdown("---")
+    st.info("💡 アクセスキーは社内管理者から取得してください")
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # ここで処理を停止（認証されるまでメインアプリを表示しない）
+    st.stop()
 
 if __name__ == "__main__":
     # 認証チェック
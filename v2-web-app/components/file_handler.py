@@ -6,6 +6,8 @@ import streamlit as st
 from pathlib import Path
 from typing import Optional, Tuple
 
+from shared.file_types import ALL_TYPES, AUDIO_EXTS, VIDEO_EXTS
+
 def display_file_info(uploaded_file) -> Tuple[str, float]:
     """
     アップロードされたファイルの情報を表示
@@ -19,18 +21,16 @@ def display_file_info(uploaded_file) -> Tuple[str, float]:
     if uploaded_file is None:
         return "", 0.0
     
-    # ファイルサイズを計算
-    file_size_mb = len(uploaded_file.getvalue()) / (1024 * 1024)
+    # ファイルサイズを計算（getvalue() はバッファ全体をコピーするため size 属性を使う）
+    file_size_mb = uploaded_file.size / (1024 * 1024)
     
     # ファイルタイプを判定
     file_extension = Path(uploaded_file.name).suffix.lower()
-    video_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.webm', '.m4v', '.3gp', '.mts'}
-    audio_extensions = {'.wav', '.mp3', '.flac', '.m4a', '.ogg'}
     
-    if file_extension in video_extensions:
+    if file_extension in VIDEO_EXTS:
         file_type = "動画"
         icon = "🎬"
-    elif file_extension in audio_extensions:
+    elif file_extension in AUDIO_EXTS:
         file_type = "音声"
         icon = "🎵"
     else:
@@ -92,7 +92,7 @@ def show_supported_formats():
             - WEBM
             """)
 
-def validate_file_size(file_size_mb: float, max_size_mb: float = 500) -> bool:
+def validate_file_size(file_size_mb: float, max_size_mb: float = 100) -> bool:
     """
     ファイルサイズの検証
     
@@ -117,8 +117,8 @@ def create_file_uploader():
     """ファイルアップローダーの作成"""
     return st.file_uploader(
         "📁 音声ファイルまたは動画ファイルを選択してください",
-        type=["wav", "mp3", "flac", "m4a", "ogg", "mp4", "avi", "mov", "mkv", "wmv", "webm"],
-        help="最大ファイルサイズ: 500MB",
+        type=list(ALL_TYPES),
+        help="最大ファイルサイズ: 100MB",
         label_visibility="visible"
     )
 
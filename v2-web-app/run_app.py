@@ -30,18 +30,29 @@ def main():
     print("⏹️  停止するには Ctrl+C を押してください")
     print("-" * 60)
     
-    try:
-        subprocess.run([
-            sys.executable, "-m", "streamlit", "run", str(app_path),
-            "--server.address", "0.0.0.0",
-            "--server.port", "8501",
-            "--server.headless", "false",
-            "--browser.gatherUsageStats", "false"
-        ])
-    except KeyboardInterrupt:
-        print("\n👋 アプリケーションを停止しました")
-    except Exception as e:
-        print(f"❌ エラーが発生しました: {e}")
+    command = [
+        sys.executable, "-m", "streamlit", "run", str(app_path),
+        "--server.address", "0.0.0.0",
+        "--server.port", "8501",
+        "--server.headless", "false",
+        "--browser.gatherUsageStats", "false"
+    ]
+    
+    if os.name == "nt":
+        # Windowsの exec* は別プロセスを起動して元のプロセスが終了し、Ctrl+Cで停止できなくなるため子プロセスで待つ
+        try:
+            subprocess.run(command)
+        except KeyboardInterrupt:
+            print("\n👋 アプリケーションを停止しました")
+        except Exception as e:
+            print(f"❌ エラーが発生しました: {e}")
+        return
+    
+    # exec後はバッファが書き出されないため先にフラッシュ
+    sys.stdout.flush()
+    
+    # POSIXでは起動スクリプト自身のプロセスをStreamlitに置き換える（親プロセスを残さず、Ctrl+Cも直接届く）
+    os.execvp(sys.executable, command)
 
 if __name__ == "__main__":
     main()